@@ -0,0 +1,182 @@
+"""
+Fingerprinted, precompressed CSS and JavaScript.
+
+`flask build-assets` copies every file in static/css and static/js to
+static/dist/ under a content-hashed name (css/style.3f2a9c1b.css), writes
+gzip and brotli siblings next to it (brotli needs the optional `brotli`
+package) and records the mapping in static/dist/manifest.json.
+
+Templates link assets with asset_url(), which takes the same arguments as
+url_for:
+
+    {{ asset_url('static', filename='css/style.css') }}
+        -> /assets/css/style.3f2a9c1b.css   (after a build)
+        -> /static/css/style.css            (no manifest, e.g. in development)
+
+/assets/ serves the smallest encoding the client accepts. A hashed name
+never changes content, so those responses are cached for a year with
+Cache-Control: immutable and repeat visitors never revalidate them.
+"""
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+
+try:
+    import brotli
+except ImportError:
+    brotli = None   # gzip only
+
+ASSET_FOLDERS = ('css', 'js')
+ASSET_EXTENSIONS = ('.css', '.js')
+# Source maps are copied under their own name: the minified files point at them
+COPY_EXTENSIONS = ('.map',)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))      # preferred first
+
+_CSS_URL = re.compile(r"""url\((['"]?)(?!data:|https?:|//|/|#)([^'")]+)\1\)""")
+
+
+class _JsonFile:
+    """A JSON file written by the build, re-read when it changes (one os.stat per call)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._data = {}
+        self._stamp = None
+
+    def get(self):
+        try:
+            st = os.stat(self.path)
+            stamp = (st.st_ino, st.st_mtime_ns)
+        except FileNotFoundError:
+            stamp = None
+        if stamp != self._stamp:
+            data = {}
+            if stamp is not None:
+                with open(self.path) as f:
+                    data = json.load(f)
+            self._data, self._stamp = data, stamp
+        return self._data
+
+    def write(self, data):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+class AssetManifest:
+    def __init__(self, static_folder, static_url_path='/static'):
+        self.static_folder = static_folder
+        self.static_url_path = static_url_path
+        self.dist_dir = os.path.join(static_folder, 'dist')
+        self.manifest_path = os.path.join(self.dist_dir, 'manifest.json')
+        self.critical_path = os.path.join(self.dist_dir, 'critical.json')
+        self._manifest = _JsonFile(self.manifest_path)
+        self._critical = _JsonFile(self.critical_path)
+        self._hashed = (None, set())
+
+    def manifest(self):
+        """{'css/style.css': 'css/style.3f2a9c1b.css'}, re-read when the file changes"""
+        return self._manifest.get()
+
+    def hashed_name(self, filename):
+        """Fingerprinted name of a static file, or None if it was not built"""
+        return self.manifest().get(filename)
+
+    def is_hashed(self, filename):
+        manifest = self.manifest()
+        if self._hashed[0] is not manifest:
+            self._hashed = (manifest, set(manifest.values()))
+        return filename in self._hashed[1]
+
+    def critical(self, page):
+        """Inline critical CSS for a page (an endpoint name), or ''"""
+        return self._critical.get().get(page, '')
+
+    def write_critical(self, pages):
+        """pages: {endpoint: css}"""
+        self._critical.write(pages)
+
+    def resolve(self, filename, accepts):
+        """(path, content encoding or None) of the best file to send for a
+        dist/ name; accepts(encoding) -> True if the client takes it"""
+        from werkzeug.security import safe_join
+        if filename.split('/', 1)[0] not in ASSET_FOLDERS:
+            return None, None
+        path = safe_join(self.dist_dir, filename)
+        if path is None or not os.path.isfile(path):
+            return None, None
+        for encoding, suffix in ENCODINGS:
+            if accepts(encoding) and os.path.isfile(path + suffix):
+                return path + suffix, encoding
+        return path, None
+
+    def _rewrite_css_urls(self, filename, text):
+        # The hashed copy lives under /assets/, so relative url()s would break
+        base = posixpath.dirname(filename)
+        return _CSS_URL.sub(
+            lambda m: f"url({m.group(1)}{self.static_url_path}/{posixpath.normpath(posixpath.join(base, m.group(2)))}{m.group(1)})",
+            text)
+
+    def build(self, transform=None):
+        """Write hashed copies + compressed siblings and the manifest.
+        transform(filename, data) -> data may rewrite a CSS/JS file first (purge).
+        Returns [(filename, bytes, gzip bytes, brotli bytes or None)]"""
+        manifest = {}
+        previous = self.manifest()
+        report = []
+        for folder in ASSET_FOLDERS:
+            for name in sorted(os.listdir(os.path.join(self.static_folder, folder))):
+                filename = f'{folder}/{name}'
+                with open(os.path.join(self.static_folder, folder, name), 'rb') as f:
+                    data = f.read()
+                if name.endswith(COPY_EXTENSIONS):
+                    target = filename
+                elif name.endswith(ASSET_EXTENSIONS):
+                    if transform is not None:
+                        data = transform(filename, data)
+                    if name.endswith('.css'):
+                        data = self._rewrite_css_urls(filename, data.decode('utf-8')).encode('utf-8')
+                    stem, ext = os.path.splitext(name)
+                    target = f'{folder}/{stem}.{hashlib.sha256(data).hexdigest()[:8]}{ext}'
+                    manifest[filename] = target
+                else:
+                    continue
+                report.append((filename, len(data)) + self._write(target, data))
+                if target != filename:
+                    self._remove_stale(filename, {target, previous.get(filename)})
+        self._manifest.write(manifest)
+        return report
+
+    def _write(self, target, data):
+        path = os.path.join(self.dist_dir, target)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        with open(path + '.gz', 'wb') as f:
+            f.write(compressed)
+        brotli_size = None
+        if brotli is not None:
+            packed = brotli.compress(data, quality=11)
+            with open(path + '.br', 'wb') as f:
+                f.write(packed)
+            brotli_size = len(packed)
+        return len(compressed), brotli_size
+
+    def _remove_stale(self, filename, keep):
+        """Delete hashed copies of a file from earlier builds, except the names in keep.
+        The build keeps the previous generation: running workers may still serve
+        (render-cached) HTML that links it until they restart"""
+        folder, name = posixpath.split(filename)
+        stem, ext = os.path.splitext(name)
+        directory = os.path.join(self.dist_dir, folder)
+        pattern = re.compile(re.escape(stem) + r'\.[0-9a-f]{8}' + re.escape(ext) + r'(\.gz|\.br)?$')
+        for existing in os.listdir(directory):
+            base = existing[:-3] if existing.endswith(('.gz', '.br')) else existing
+            if pattern.match(existing) and posixpath.join(folder, base) not in keep:
+                os.remove(os.path.join(directory, existing))
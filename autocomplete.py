@@ -0,0 +1,219 @@
+"""
+In-memory autocomplete index for the live /search dropdown.
+
+Built from the catalog snapshot (catalog_cache.py), so the dropdown never
+touches the database:
+
+- a sorted vocabulary of normalized words, searched with bisect for prefixes
+- a trigram -> words map for typo tolerance ("cyliner" still finds "cylinder")
+- a pre-serialized JSON fragment per service, so a response is just a join
+
+When the catalog version changes the index is synced incrementally: only
+services whose indexed fields changed are re-indexed.
+"""
+import bisect
+import json
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+_TOKEN_RE = re.compile(r'[^\W_]+', re.UNICODE)
+
+# Field weights used for ranking: a hit in the name beats one in the description
+FIELD_WEIGHTS = (('name', 3.0), ('short_desc', 2.0), ('description', 1.0))
+_INDEXED_FIELDS = ('id', 'name', 'slug', 'short_desc', 'description')
+
+
+def normalize(text):
+    """Lower-case, strip accents and split into word tokens"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _TOKEN_RE.findall(text.lower())
+
+
+def trigrams(word):
+    padded = f'  {word}'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance, giving up (returns limit + 1) once it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        if min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+def json_fragment(row):
+    """The JSON object /search returns for one service (same shape as before)"""
+    return json.dumps({
+        "id": row.get('id'),
+        "name": row.get('name'),
+        "slug": row.get('slug'),
+        "short_desc": row.get('short_desc') or ''
+    }, sort_keys=True, separators=(',', ':'))
+
+
+class AutocompleteIndex:
+    """Typo-tolerant prefix index over service names and keywords"""
+
+    def __init__(self, result_cache_size=1024):
+        self._lock = threading.RLock()
+        self.version = None
+        self._rows = {}          # service id -> indexed fields (to detect changes)
+        self._names = {}         # service id -> lower-cased name, for tie-breaks
+        self._fragments = {}     # service id -> JSON fragment
+        self._postings = {}      # word -> {service id: best field weight}
+        self._vocab = []         # sorted words, for bisect prefix search
+        self._trigrams = {}      # trigram -> set of words
+        self._results = OrderedDict()   # query -> JSON body (LRU)
+        self._result_cache_size = result_cache_size
+
+    # ---- maintenance ----
+    def sync(self, rows, version):
+        """Bring the index in line with the catalog rows, touching only what changed"""
+        with self._lock:
+            if version == self.version:
+                return
+            seen = set()
+            for row in rows:
+                sid = row['id']
+                seen.add(sid)
+                fields = tuple(row.get(f) for f in _INDEXED_FIELDS)
+                if self._rows.get(sid) != fields:
+                    self._remove(sid)
+                    self._add(row, fields)
+            for sid in [s for s in self._rows if s not in seen]:
+                self._remove(sid)
+            self.version = version
+            self._results.clear()
+
+    def _add(self, row, fields):
+        sid = row['id']
+        self._rows[sid] = fields
+        self._names[sid] = (row.get('name') or '').lower()
+        self._fragments[sid] = json_fragment(row)
+        for field, weight in FIELD_WEIGHTS:
+            for word in normalize(row.get(field)):
+                posting = self._postings.get(word)
+                if posting is None:
+                    posting = self._postings[word] = {}
+                    bisect.insort(self._vocab, word)
+                    for tg in trigrams(word):
+                        self._trigrams.setdefault(tg, set()).add(word)
+                if posting.get(sid, 0) < weight:
+                    posting[sid] = weight
+
+    def _remove(self, sid):
+        fields = self._rows.pop(sid, None)
+        if fields is None:
+            return
+        self._names.pop(sid, None)
+        self._fragments.pop(sid, None)
+        row = dict(zip(_INDEXED_FIELDS, fields))
+        for field, _ in FIELD_WEIGHTS:
+            for word in normalize(row.get(field)):
+                posting = self._postings.get(word)
+                if posting is None:
+                    continue
+                posting.pop(sid, None)
+                if not posting:
+                    del self._postings[word]
+                    i = bisect.bisect_left(self._vocab, word)
+                    if i < len(self._vocab) and self._vocab[i] == word:
+                        del self._vocab[i]
+                    for tg in trigrams(word):
+                        words = self._trigrams.get(tg)
+                        if words is not None:
+                            words.discard(word)
+                            if not words:
+                                del self._trigrams[tg]
+
+    # ---- lookup ----
+    def _prefix_words(self, token):
+        i = bisect.bisect_left(self._vocab, token)
+        words = []
+        while i < len(self._vocab) and self._vocab[i].startswith(token):
+            words.append(self._vocab[i])
+            i += 1
+        return words
+
+    def _fuzzy_words(self, token):
+        """Words whose prefix is within 1 edit (2 for long tokens) of token"""
+        if len(token) < 3:
+            return []
+        limit = 1 if len(token) < 8 else 2
+        grams = trigrams(token)
+        counts = {}
+        for tg in grams:
+            for word in self._trigrams.get(tg, ()):
+                counts[word] = counts.get(word, 0) + 1
+        # one edit breaks at most 3 trigrams; short tokens may share just one
+        needed = max(1 if len(token) <= 4 else 2, len(grams) - 3 * limit)
+        matches = []
+        for word, shared in counts.items():
+            if shared < needed:
+                continue
+            # compare against the word's prefix of similar length (prefix search with typos)
+            best = min(edit_distance(token, word[:n], limit)
+                       for n in range(max(1, len(token) - limit), len(token) + limit + 1))
+            if best <= limit:
+                matches.append(word)
+        return matches
+
+    def _score(self, token):
+        """service id -> score for one query token (exact prefix beats fuzzy)"""
+        words = self._prefix_words(token)
+        penalty = 1.0
+        if not words:
+            words = self._fuzzy_words(token)
+            penalty = 0.5
+        scores = {}
+        for word in words:
+            bonus = 1.0 if word == token else 0.8
+            for sid, weight in self._postings[word].items():
+                s = weight * bonus * penalty
+                if s > scores.get(sid, 0):
+                    scores[sid] = s
+        return scores
+
+    def query_ids(self, q, limit=20):
+        """Best matching service ids: every query word must match (as a prefix, or fuzzily)"""
+        tokens = normalize(q)
+        if not tokens:
+            return []
+        with self._lock:
+            total = None
+            for token in tokens:
+                scores = self._score(token)
+                if total is None:
+                    total = scores
+                else:
+                    total = {sid: total[sid] + s for sid, s in scores.items() if sid in total}
+                if not total:
+                    return []
+            ranked = sorted(total.items(), key=lambda item: (-item[1], self._names.get(item[0], '')))
+            return [sid for sid, _ in ranked[:limit]]
+
+    def query_json(self, q, limit=20):
+        """JSON array body for /search, assembled from pre-serialized fragments"""
+        key = (' '.join(normalize(q)), limit)
+        with self._lock:
+            body = self._results.get(key)
+            if body is not None:
+                self._results.move_to_end(key)
+                return body
+            ids = self.query_ids(q, limit)
+            body = '[' + ','.join(self._fragments[sid] for sid in ids) + ']'
+            self._results[key] = body
+            if len(self._results) > self._result_cache_size:
+                self._results.popitem(last=False)
+            return body
@@ -0,0 +1,71 @@
+"""
+Import-time budget check for app.py (exits non-zero when over budget).
+
+Imports the app in fresh interpreters and checks that
+  - the median time for `import app` stays under the budget
+  - importing opened no database connection (schema work is deferred)
+  - heavy modules (reportlab, num2words, email.mime, PIL) were not imported
+
+Run: python benchmarks/import_budget.py [--budget-ms 600] [--runs 5]
+(IMPORT_BUDGET_MS also sets the budget, e.g. for CI on slower machines)
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAZY_MODULES = ('reportlab', 'num2words', 'email.mime', 'multiprocessing', 'PIL')
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    'ms': elapsed * 1000,
+    'timeline': app.timeline.as_dict()['stages'],
+    'db_connections': app.db_pool.stats()['created'],
+    'loaded': [m for m in %r if m in sys.modules],
+}))
+"""
+
+
+def probe():
+    out = subprocess.run([sys.executable, '-c', _PROBE % (LAZY_MODULES,)], cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=float(os.environ.get('IMPORT_BUDGET_MS', 600)))
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    results = [probe() for _ in range(args.runs)]
+    median = statistics.median(r['ms'] for r in results)
+    last = results[-1]
+    print(f"import app: median {median:.0f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    print("timeline:   " + ' → '.join(f"{s['stage']} {s['ms']:.0f} ms" for s in last['timeline']))
+
+    failures = []
+    if median > args.budget_ms:
+        failures.append(f"import took {median:.0f} ms, budget is {args.budget_ms:.0f} ms")
+    if any(r['db_connections'] for r in results):
+        failures.append("importing the app opened a database connection")
+    loaded = sorted({m for r in results for m in r['loaded']})
+    if loaded:
+        failures.append(f"heavy modules imported eagerly: {', '.join(loaded)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
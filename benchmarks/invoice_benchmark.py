@@ -0,0 +1,148 @@
+"""
+Invoice micro-benchmarks: the full PDF build and its parts.
+
+Times, with the per-process resources already loaded as in a warm worker:
+  - the full build_invoice_pdf() for an intra-state and an inter-state order
+  - style sheet creation (build_styles) and the watermark decode (load_watermark),
+    which a worker pays once
+  - the story (flowables) and its table layout (wrap at the page frame width)
+  - add_watermark() on a fresh canvas (includes embedding the image), next to
+    a blank page for reference
+  - amount_in_words() (num2words) and compute_gst() for both GST branches
+
+Each benchmark reports the best and median time per call over --repeat
+rounds. --history appends the results (with the commit and a timestamp)
+to a JSON-lines file and prints the change against the previous entry, so
+improvements to invoice generation show up over time.
+
+Run: python benchmarks/invoice_benchmark.py [--repeat 5] [--min-time 0.2]
+        [--history benchmarks/invoice_history.jsonl] [--only gst,words]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import invoice  # noqa: E402
+
+INTRA_STATE = {'name': 'Shree Gas Agencies', 'address': 'Plot 12, MIDC Bhosari, Pune, Maharashtra 411026',
+               'phone': '9822012345', 'email': 'accounts@shreegas.example', 'quantity': 3, 'price': 125000,
+               'order_date': '2025-03-14'}
+INTER_STATE = dict(INTRA_STATE, address='Sector 8, Industrial Estate, Gurugram, Haryana 122001')
+AMOUNTS = (1180.0, 147500.0, 442500.0, 1234567.89)
+
+
+def _layout(story, res):
+    """Lay the flowables out in the page frame, as the doc template does"""
+    width = res['A4'][0] - 90
+    height = res['A4'][1] - 80
+    for flowable in story:
+        flowable.wrap(width, height)
+
+
+def _page(draw):
+    from reportlab.pdfgen.canvas import Canvas
+    canvas = Canvas(BytesIO(), pagesize=invoice.load_resources()['A4'])
+    draw(canvas)
+    canvas.showPage()
+    canvas.save()
+
+
+def benchmarks():
+    """name -> zero-argument callable"""
+    res = invoice.load_resources()
+    return {
+        'pdf_intra_state': lambda: invoice.build_invoice_pdf(INTRA_STATE, 1042, BytesIO()),
+        'pdf_inter_state': lambda: invoice.build_invoice_pdf(INTER_STATE, 1043, BytesIO()),
+        'styles': invoice.build_styles,
+        'watermark_decode': invoice.load_watermark,
+        'story': lambda: invoice.invoice_story(INTRA_STATE, 1042),
+        'story_and_layout': lambda: _layout(invoice.invoice_story(INTRA_STATE, 1042), res),
+        'blank_page': lambda: _page(lambda canvas: None),
+        'watermark_page': lambda: _page(lambda canvas: invoice.add_watermark(canvas, None)),
+        'words': lambda: [invoice.amount_in_words(a) for a in AMOUNTS],
+        'gst_intra_state': lambda: invoice.compute_gst(375000.0, INTRA_STATE['address']),
+        'gst_inter_state': lambda: invoice.compute_gst(375000.0, INTER_STATE['address']),
+    }
+
+
+def measure(func, repeat, min_time):
+    """Seconds per call: (best, median) over `repeat` rounds of at least min_time each"""
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2 if number < 1000 else 10
+    times = [t / number for t in timer.repeat(repeat, number)]
+    return min(times), statistics.median(times), number
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _previous(history):
+    if not history or not os.path.exists(history):
+        return None
+    last = None
+    with open(history) as f:
+        for line in f:
+            if line.strip():
+                last = json.loads(line)
+    return last
+
+
+def _fmt(seconds):
+    if seconds >= 1e-3:
+        return f"{seconds * 1000:.2f} ms"
+    return f"{seconds * 1e6:.1f} µs"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help="seconds per round")
+    parser.add_argument('--history', help="JSON-lines file to append the results to")
+    parser.add_argument('--only', help="comma-separated benchmark names")
+    args = parser.parse_args()
+
+    cases = benchmarks()
+    if args.only:
+        names = args.only.split(',')
+        cases = {name: func for name, func in cases.items() if any(n in name for n in names)}
+    previous = _previous(args.history)
+    before = (previous or {}).get('results', {})
+
+    results = {}
+    print(f"{'benchmark':<20}{'best':>12}{'median':>12}{'calls':>8}  vs previous")
+    for name, func in cases.items():
+        func()                                   # warm caches (fonts, imports)
+        best, median, number = measure(func, args.repeat, args.min_time)
+        results[name] = {'best_s': best, 'median_s': median}
+        change = ''
+        if name in before:
+            change = f"{(median / before[name]['median_s'] - 1) * 100:+.1f}%"
+        print(f"{name:<20}{_fmt(best):>12}{_fmt(median):>12}{number:>8}  {change}")
+
+    if args.history:
+        record = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': _commit(),
+                  'python': platform.python_version(), 'results': results}
+        with open(args.history, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+        print(f"\nAppended to {args.history}")
+
+
+if __name__ == '__main__':
+    main()
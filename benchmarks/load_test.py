@@ -0,0 +1,320 @@
+"""
+Load test: throughput and latency of the public and admin pages.
+
+Builds a throw-away SQLite database through the app's migrations, seeds a
+synthetic dataset (services spread over DIVISIONS, orders with their status
+log, feedback and contacts), starts the app in a separate process and
+drives it with concurrent HTTP clients for a fixed time. Reports
+requests/sec and p50/p95/p99 latency per route.
+
+--output writes the results as a JSON baseline; --compare checks a run
+against one and exits non-zero on a regression (throughput down, or a
+route's p95 up, by more than --tolerance), so CI can gate on it.
+
+Run: python benchmarks/load_test.py [--services 500] [--orders 5000] [--feedback 1000]
+        [--contacts 1000] [--concurrency 8] [--seconds 10] [--server werkzeug|gunicorn]
+        [--output baseline.json] [--compare baseline.json] [--tolerance 0.25]
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import platform
+import random
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from products_data import DIVISIONS, PRODUCTS  # noqa: E402
+
+# (route label, weight, admin) - labels group URLs with different parameters
+ROUTES = [
+    ('/', 3, False),
+    ('/services', 3, False),
+    ('/services/product/<slug>', 4, False),
+    ('/search?q=<term>', 3, False),
+    ('/search-results?q=<term>', 1, False),
+    ('/admin/dashboard', 1, True),
+    ('/admin/orders', 1, True),
+    ('/admin/orders/<id>', 1, True),
+    ('/admin/contacts', 1, True),
+    ('/admin/feedback', 1, True),
+]
+SEARCH_TERMS = ['cylinder', 'water jacket', 'hydro', 'pressure gauge', 'cng testing', 'shutter', 'cyliner']
+STATUSES = ('process', 'shipped', 'complete', 'cancel')
+
+
+def _environment(tmp):
+    env = dict(os.environ)
+    env.pop('DATABASE_URL', None)
+    env.update({
+        'PYTHONPATH': ROOT, 'OUTBOX_SENDER': 'off', 'SQLITE_MAINTENANCE_SECONDS': '0', 'LOG_REQUESTS': '0',
+        'CATALOG_VERSION_FILE': os.path.join(tmp, '.catalog_version'),
+        'FEEDBACK_VERSION_FILE': os.path.join(tmp, '.feedback_version'),
+        'INVOICE_CACHE_DIR': os.path.join(tmp, 'invoice_cache'),
+    })
+    return env
+
+
+def seed(tmp, env, services, orders, feedback, contacts, seed=42):
+    """Create the schema with the app's migrations, then bulk-insert synthetic rows"""
+    subprocess.run([sys.executable, '-c', 'import app; app.ensure_db()'], cwd=tmp, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    rng = random.Random(seed)
+    products = list(PRODUCTS.values())
+    conn = sqlite3.connect(os.path.join(tmp, 'database.db'))
+    rows = []
+    for i in range(services):
+        p = products[i % len(products)]
+        division = DIVISIONS[i % len(DIVISIONS)]
+        rows.append((f"{p['name']} {i}", f"{p['slug']}-{i}", division['name'], division['id'],
+                     p.get('short_desc'), p.get('description'), p.get('image'), i))
+    conn.executemany("INSERT INTO services (name, slug, division, division_id, short_desc, description, image, "
+                     "sort_order) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    start = time.time() - 365 * 86400
+    rows = []
+    for i in range(orders):
+        day = time.strftime('%Y-%m-%d', time.localtime(start + rng.random() * 365 * 86400))
+        rows.append((f'Customer {i}', f'{rng.randint(1, 999)} Industrial Area, Delhi', f'98{rng.randint(10**7, 10**8 - 1)}',
+                     f'customer{i}@example.com', rng.randint(1, 5), day, rng.choice(STATUSES),
+                     rng.choice((5000, 25000, 45000, 125000))))
+    conn.executemany("INSERT INTO orders (name, address, phone, email, quantity, order_date, status, price) "
+                     "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.execute("INSERT INTO order_status_log (order_id, status) SELECT id, status FROM orders")
+    conn.executemany("INSERT INTO feedback (name, rating, message, status) VALUES (?, ?, ?, ?)",
+                     [(f'Visitor {i}', rng.randint(3, 5), 'Good equipment and quick support.',
+                       'approved' if rng.random() < 0.7 else 'pending') for i in range(feedback)])
+    conn.executemany("INSERT INTO contacts (name, email, phone, message) VALUES (?, ?, ?, ?)",
+                     [(f'Lead {i}', f'lead{i}@example.com', '9999999999', 'Please send a quotation.')
+                      for i in range(contacts)])
+    conn.commit()
+    slugs = [r[0] for r in conn.execute("SELECT slug FROM services")]
+    order_ids = [r[0] for r in conn.execute("SELECT id FROM orders")]
+    conn.close()
+    return slugs, order_ids
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(tmp, env, kind, workers):
+    port = _free_port()
+    if kind == 'gunicorn':
+        cmd = [sys.executable, '-m', 'gunicorn', '-c', os.path.join(ROOT, 'gunicorn.conf.py'),
+               '-b', f'127.0.0.1:{port}', '-w', str(workers), '--threads', '4', 'app:create_app()']
+    else:
+        cmd = [sys.executable, '-c', 'import app; from werkzeug.serving import run_simple; '
+               f'run_simple("127.0.0.1", {port}, app.app, threaded=True)']
+    log = open(os.path.join(tmp, 'server.log'), 'w')
+    proc = subprocess.Popen(cmd, cwd=tmp, env=env, stdout=log, stderr=subprocess.STDOUT)
+    base = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited, see {log.name}")
+        try:
+            urllib.request.urlopen(base + '/', timeout=2).read()
+            return proc, base
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("server did not start within 30 s")
+
+
+class Client:
+    """One simulated visitor: its own cookie jar (the admin session)"""
+
+    def __init__(self, base, slugs, order_ids, rng):
+        self.base = base
+        self.slugs = slugs
+        self.order_ids = order_ids
+        self.rng = rng
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        self.logged_in = False
+
+    def login(self):
+        data = urllib.parse.urlencode({'username': 'admin', 'password': 'admin123'}).encode()
+        self.opener.open(self.base + '/admin/login', data=data, timeout=30).read()
+        self.logged_in = True
+
+    def url(self, label):
+        if '<slug>' in label:
+            return label.replace('<slug>', self.rng.choice(self.slugs))
+        if '<term>' in label:
+            return label.replace('<term>', urllib.parse.quote(self.rng.choice(SEARCH_TERMS)))
+        if '<id>' in label:
+            return label.replace('<id>', str(self.rng.choice(self.order_ids)))
+        return label
+
+    def request(self, label, admin):
+        if admin and not self.logged_in:
+            self.login()
+        start = time.perf_counter()
+        try:
+            with self.opener.open(self.base + self.url(label), timeout=30) as response:
+                response.read()
+                ok = response.status == 200
+        except (urllib.error.URLError, ConnectionError, TimeoutError):
+            ok = False
+        return ok, time.perf_counter() - start
+
+
+def run(base, slugs, order_ids, concurrency, seconds, warmup, seed=42):
+    """{label: ([latency seconds], errors)} and the measured wall time"""
+    labels = [label for label, _, _ in ROUTES]
+    weights = [weight for _, weight, _ in ROUTES]
+    admin = {label: is_admin for label, _, is_admin in ROUTES}
+    results = {label: ([], [0]) for label in labels}
+    lock = threading.Lock()
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + seconds
+
+    def worker(n):
+        rng = random.Random(seed + n)
+        client = Client(base, slugs, order_ids, rng)
+        while True:
+            now = time.perf_counter()
+            if now >= stop_at:
+                return
+            label = rng.choices(labels, weights)[0]
+            ok, elapsed = client.request(label, admin[label])
+            if now >= measure_from:
+                with lock:
+                    latencies, errors = results[label]
+                    if ok:
+                        latencies.append(elapsed)
+                    else:
+                        errors[0] += 1
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, seconds
+
+
+def _percentiles(latencies):
+    if not latencies:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None}
+    if len(latencies) == 1:
+        value = round(latencies[0] * 1000, 2)
+        return {'p50_ms': value, 'p95_ms': value, 'p99_ms': value}
+    q = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {'p50_ms': round(q[49] * 1000, 2), 'p95_ms': round(q[94] * 1000, 2), 'p99_ms': round(q[98] * 1000, 2)}
+
+
+def summarize(results, seconds, settings):
+    routes = {}
+    every = []
+    errors = 0
+    for label, (latencies, errs) in results.items():
+        every.extend(latencies)
+        errors += errs[0]
+        routes[label] = dict(requests=len(latencies), errors=errs[0],
+                             rps=round(len(latencies) / seconds, 1), **_percentiles(latencies))
+    return {
+        'settings': settings,
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'cpus': os.cpu_count()},
+        'overall': dict(requests=len(every), errors=errors, rps=round(len(every) / seconds, 1),
+                        **_percentiles(every)),
+        'routes': routes,
+    }
+
+
+def compare(current, baseline, tolerance, min_delta_ms):
+    """Regressions of current against baseline, as messages"""
+    problems = []
+    base_rps, rps = baseline['overall']['rps'], current['overall']['rps']
+    if base_rps and rps < base_rps * (1 - tolerance):
+        problems.append(f"throughput {rps} req/s is below the baseline {base_rps} req/s by more than {tolerance:.0%}")
+    for label, base in baseline['routes'].items():
+        route = current['routes'].get(label)
+        if not route or base['p95_ms'] is None or route['p95_ms'] is None:
+            continue
+        if route['p95_ms'] > base['p95_ms'] * (1 + tolerance) and route['p95_ms'] - base['p95_ms'] > min_delta_ms:
+            problems.append(f"{label}: p95 {route['p95_ms']} ms vs baseline {base['p95_ms']} ms")
+    if current['overall']['errors'] > baseline['overall']['errors']:
+        problems.append(f"{current['overall']['errors']} failed requests (baseline {baseline['overall']['errors']})")
+    if baseline.get('settings') != current.get('settings'):
+        print("note: settings differ from the baseline's, the comparison may not be meaningful")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--services', type=int, default=500)
+    parser.add_argument('--orders', type=int, default=5000)
+    parser.add_argument('--feedback', type=int, default=1000)
+    parser.add_argument('--contacts', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--warmup', type=float, default=2)
+    parser.add_argument('--server', choices=('werkzeug', 'gunicorn'), default='werkzeug')
+    parser.add_argument('--workers', type=int, default=2, help="gunicorn workers")
+    parser.add_argument('--output', help="write the results as a JSON baseline")
+    parser.add_argument('--compare', help="baseline JSON to check against (exit 1 on regression)")
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--min-delta-ms', type=float, default=2.0,
+                        help="ignore p95 increases smaller than this (timer noise on fast routes)")
+    args = parser.parse_args()
+
+    settings = {k: getattr(args, k) for k in ('services', 'orders', 'feedback', 'contacts', 'concurrency',
+                                              'seconds', 'server')}
+    if args.server == 'gunicorn':
+        settings['workers'] = args.workers
+    with tempfile.TemporaryDirectory() as tmp:
+        env = _environment(tmp)
+        start = time.perf_counter()
+        slugs, order_ids = seed(tmp, env, args.services, args.orders, args.feedback, args.contacts)
+        print(f"Seeded {len(slugs)} services, {len(order_ids)} orders, {args.feedback} feedback, "
+              f"{args.contacts} contacts in {time.perf_counter() - start:.1f} s")
+        proc, base = start_server(tmp, env, args.server, args.workers)
+        try:
+            print(f"Driving {base} ({args.server}) with {args.concurrency} clients for {args.seconds:.0f} s "
+                  f"after {args.warmup:.0f} s warm-up")
+            results, seconds = run(base, slugs, order_ids, args.concurrency, args.seconds, args.warmup)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    report = summarize(results, seconds, settings)
+    print(f"\n{'route':<28}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for label, r in list(report['routes'].items()) + [('overall', report['overall'])]:
+        cells = [f"{r[k]:>9.1f}" if r[k] is not None else f"{'-':>9}" for k in ('p50_ms', 'p95_ms', 'p99_ms')]
+        print(f"{label:<28}{r['rps']:>8.1f}{''.join(cells)}{r['errors']:>8}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        problems = compare(report, baseline, args.tolerance, args.min_delta_ms)
+        if problems:
+            print("\nREGRESSION:")
+            for p in problems:
+                print(f"  - {p}")
+            sys.exit(1)
+        print(f"\nOK: within {args.tolerance:.0%} of {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Search latency benchmark: old LIKE '%q%' scan vs the FTS5 index.
+
+Builds throw-away SQLite catalogs of growing size from the words in
+products_data.py and times the queries /search runs against each.
+
+Run: python benchmarks/search_benchmark.py [--sizes 1000,10000,100000] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from products_data import PRODUCTS  # noqa: E402
+from search_index import SearchIndex, tokenize  # noqa: E402
+
+QUERIES = ['cylinder', 'water jacket', 'hydro', 'pressure gauge', 'cng testing', 'zzzz']
+
+LIKE_SQL = ("SELECT id, name, slug, short_desc FROM services "
+            "WHERE LOWER(name) LIKE ? OR LOWER(short_desc) LIKE ? OR LOWER(description) LIKE ? "
+            "ORDER BY name LIMIT 20")
+
+
+def _execute(conn, query, params=None):
+    return conn.execute(query, params) if params else conn.execute(query)
+
+
+def _pseudo_word(rng):
+    return ''.join(rng.choice('bcdfghklmnprstvz') + rng.choice('aeiou') for _ in range(rng.randint(2, 4)))
+
+
+def build_catalog(path, size, seed=42):
+    """Create a services table with `size` synthetic rows plus the FTS index.
+
+    Text mixes real catalog words with a large pseudo-word vocabulary so a
+    real term like "cylinder" hits a few percent of rows, as in a big catalog.
+    """
+    rng = random.Random(seed)
+    real = sorted({t for p in PRODUCTS.values() for f in ('name', 'short_desc', 'description')
+                   for t in tokenize(p.get(f) or '')})
+    filler = [_pseudo_word(rng) for _ in range(20000)]
+    vocab = real + filler * 3
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("""
+        CREATE TABLE services (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL, slug TEXT NOT NULL UNIQUE,
+            division TEXT NOT NULL, division_id TEXT NOT NULL,
+            short_desc TEXT, description TEXT,
+            image TEXT DEFAULT 'image/manufacture.jpg', gallery_images TEXT,
+            sort_order INTEGER DEFAULT 0, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    index = SearchIndex(_execute, use_postgres=False)
+    index.ensure(conn)
+    rows = []
+    for i in range(size):
+        name = ' '.join(rng.choice(vocab) for _ in range(3)).title()
+        rows.append((name, f'svc-{i}', 'HYDROTEST MACHINE', 'hydrotest',
+                     ' '.join(rng.choice(vocab) for _ in range(12)),
+                     ' '.join(rng.choice(vocab) for _ in range(60))))
+    conn.executemany("INSERT INTO services (name, slug, division, division_id, short_desc, description) "
+                     "VALUES (?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    return conn, index
+
+
+def time_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'services':>10} {'query':>16} {'LIKE ms':>10} {'FTS ms':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in [int(s) for s in args.sizes.split(',')]:
+            conn, index = build_catalog(os.path.join(tmp, f'bench_{size}.db'), size)
+            for q in QUERIES:
+                like = f"%{q.lower()}%"
+                like_ms = time_ms(lambda: conn.execute(LIKE_SQL, (like, like, like)).fetchall(), args.repeat)
+                fts_ms = time_ms(lambda: index.search(conn, q, limit=20), args.repeat)
+                print(f"{size:>10} {q:>16} {like_ms:>10.2f} {fts_ms:>10.2f} {like_ms / fts_ms if fts_ms else 0:>7.1f}x")
+            conn.close()
+
+
+if __name__ == '__main__':
+    main()
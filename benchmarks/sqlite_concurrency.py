@@ -0,0 +1,126 @@
+"""
+SQLite concurrency benchmark: default connection settings vs the tuned profile.
+
+Runs reader and writer processes (like gunicorn workers) against a
+throw-away database for a fixed time and reports throughput, read latency
+and "database is locked" errors for the old connection defaults and the
+tuned profile (sqlite_tuning.PROFILES).
+
+Readers run the home page feedback query and the dashboard counts; writers
+insert contact submissions, one transaction each, like the contact form.
+
+Run: python benchmarks/sqlite_concurrency.py [--readers 4] [--writers 2] [--seconds 5]
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlite_tuning import PROFILES, connect_sqlite  # noqa: E402
+
+READS = [
+    "SELECT * FROM feedback WHERE status = 'approved' ORDER BY date DESC LIMIT 6",
+    "SELECT COUNT(*) FROM contacts",
+]
+WRITE = "INSERT INTO contacts (name, email, phone, message) VALUES (?, ?, ?, ?)"
+
+
+def build_database(path, rows=20000):
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE feedback (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL,
+            rating INTEGER NOT NULL, message TEXT NOT NULL, status TEXT DEFAULT 'pending',
+            date TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        CREATE TABLE contacts (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL,
+            email TEXT, phone TEXT, message TEXT, date TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+    """)
+    conn.executemany("INSERT INTO feedback (name, rating, message, status, date) VALUES (?, 5, ?, ?, ?)",
+                     [(f'user {i}', 'great service ' * 5, 'approved' if i % 3 else 'pending',
+                       f'2025-{i % 12 + 1:02d}-{i % 28 + 1:02d} 10:00:00') for i in range(rows)])
+    conn.executemany(WRITE, [(f'c {i}', 'c@example.com', '123', 'hello ' * 20) for i in range(rows)])
+    conn.commit()
+    conn.close()
+
+
+def worker(role, path, settings, seconds, start_at, results):
+    ops = errors = 0
+    latencies = []
+    try:
+        conn = connect_sqlite(path, settings)
+        while time.time() < start_at:
+            time.sleep(0.001)
+        deadline = start_at + seconds
+        while time.time() < deadline:
+            t = time.perf_counter()
+            try:
+                if role == 'reader':
+                    for q in READS:
+                        conn.execute(q).fetchall()
+                else:
+                    conn.execute(WRITE, ('bench', 'b@example.com', '1', 'load test message'))
+                    conn.commit()
+                ops += 1
+                latencies.append(time.perf_counter() - t)
+            except sqlite3.OperationalError:      # database is locked
+                errors += 1
+                conn.rollback()
+        conn.close()
+    finally:
+        results.put((role, ops, errors, latencies))
+
+
+def run(profile, args, tmp):
+    path = os.path.join(tmp, f'bench_{profile}.db')
+    build_database(path)
+    settings = dict(PROFILES[profile])
+    connect_sqlite(path, settings).close()      # e.g. switch the file to WAL, as the app's first connection does
+    if args.busy_timeout_ms is not None:
+        settings['busy_timeout_ms'] = args.busy_timeout_ms
+    results = multiprocessing.Queue()
+    start_at = time.time() + 1.0
+    procs = [multiprocessing.Process(target=worker, args=(role, path, settings, args.seconds, start_at, results))
+             for role in ['reader'] * args.readers + ['writer'] * args.writers]
+    for p in procs:
+        p.start()
+    totals = {'reader': [0, 0, []], 'writer': [0, 0, []]}
+    for _ in procs:
+        role, ops, errors, latencies = results.get()
+        totals[role][0] += ops
+        totals[role][1] += errors
+        totals[role][2].extend(latencies)
+    for p in procs:
+        p.join()
+    return totals
+
+
+def _p95(samples):
+    return statistics.quantiles(samples, n=20)[-1] * 1000 if len(samples) >= 20 else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--busy-timeout-ms', type=int, default=None,
+                        help='override the profiles\' busy timeout (0 shows raw lock errors)')
+    args = parser.parse_args()
+
+    print(f"{'profile':>10} {'reads/s':>9} {'read p95 ms':>12} {'writes/s':>9} {'write p95 ms':>13} {'lock errors':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in ('default', 'production'):      # before / after
+            t = run(profile, args, tmp)
+            reads, read_err, read_lat = t['reader']
+            writes, write_err, write_lat = t['writer']
+            print(f"{profile:>10} {reads / args.seconds:>9.0f} {_p95(read_lat):>12.2f} "
+                  f"{writes / args.seconds:>9.0f} {_p95(write_lat):>13.2f} {read_err + write_err:>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+In-memory snapshot of the `services` table (the public product catalog).
+
+The catalog only changes when an admin adds, edits or deletes a service, so
+the public pages read from this snapshot instead of querying the database.
+
+Cross-process invalidation: after an admin write commits, invalidate()
+atomically replaces a small version file. Every gunicorn worker compares
+the file's (inode, mtime) with the one its snapshot was built from - a
+single os.stat() per request - and reloads when it differs.
+
+Settings (environment variables, optional):
+    CATALOG_VERSION_FILE   path of the version file (default: .catalog_version
+                           next to app.py - must be shared by all workers)
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+def parse_gallery_images(product):
+    """Gallery list for a service row: JSON list, comma-separated string or the main image"""
+    gallery_images = [product.get('image')] if product.get('image') else []
+    if product.get('gallery_images'):
+        try:
+            images = json.loads(product.get('gallery_images'))
+            if isinstance(images, list) and images:
+                gallery_images = images
+        except Exception:
+            # fallback: comma-separated values
+            if isinstance(product.get('gallery_images'), str):
+                images = [i.strip() for i in product.get('gallery_images').split(',') if i.strip()]
+                if images:
+                    gallery_images = images
+    return gallery_images
+
+
+class CatalogSnapshot:
+    """Immutable view of the catalog at one version - never mutate its rows"""
+
+    def __init__(self, rows, version):
+        self.version = version
+        self.loaded_at = time.time()
+        # rows are already ordered by division_id, sort_order, name
+        self.rows = rows
+        self.by_slug = {}
+        self.by_division = {}
+        self.gallery_images = {}
+        # Lower-cased search fields, sorted by name, so search needs no per-hit work
+        self.search_rows = []
+        for r in rows:
+            self.by_slug[r['slug']] = r
+            self.by_division.setdefault(r.get('division_id', 'hydrotest'), []).append(r)
+            self.gallery_images[r['slug']] = parse_gallery_images(r)
+            self.search_rows.append((r, (r.get('name') or '').lower(),
+                                     (r.get('short_desc') or '').lower(),
+                                     (r.get('description') or '').lower()))
+        self.search_rows.sort(key=lambda item: item[0].get('name') or '')
+
+
+class VersionFile:
+    """Cross-process change marker: bump() after a write, current() to compare"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def current(self):
+        """(inode, mtime_ns), or None if never bumped - one os.stat()"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns)
+
+    def ensure(self):
+        """current(), creating the file first if needed"""
+        version = self.current()
+        if version is None:
+            self.bump()
+            version = self.current()
+        return version
+
+    def bump(self):
+        # Write to a temp file and rename so every bump gets a new inode -
+        # workers notice the change even within the same mtime tick.
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(self.path) + '.', dir=directory)
+        with os.fdopen(fd, 'w') as f:
+            f.write(f"{time.time()}\n")
+        os.replace(tmp_path, self.path)
+
+
+class CatalogCache:
+    """Process-local catalog snapshot, reloaded when the shared version file changes"""
+
+    def __init__(self, load_rows, version_file):
+        self._load_rows = load_rows    # () -> list of service dicts in display order
+        self.version_file = version_file
+        self._version = VersionFile(version_file)
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def version(self):
+        """(inode, mtime_ns) of the version file, or None before the first load.
+        One os.stat(), no database - usable as a cache validator"""
+        return self._version.current()
+
+    def get(self):
+        """Current snapshot - reloads from the database only if another
+        process (or this one) bumped the version file"""
+        version = self._version.current()
+        snap = self._snapshot
+        if snap is not None and snap.version == version and version is not None:
+            return snap
+        with self._lock:
+            snap = self._snapshot
+            if snap is not None and snap.version == version and version is not None:
+                return snap
+            # First run on this host creates the version file
+            version = self._version.ensure()
+            snap = CatalogSnapshot(self._load_rows(), version)
+            self._snapshot = snap
+            self.reloads += 1
+            return snap
+
+    def invalidate(self):
+        """Call after an admin write to `services` has been committed"""
+        with self._lock:
+            self._version.bump()
+            self._snapshot = None
+
+    # Convenience accessors used by the routes
+    def products_by_division(self):
+        return self.get().by_division
+
+    def product(self, slug):
+        """(row, gallery_images) for a slug, or (None, None)"""
+        snap = self.get()
+        row = snap.by_slug.get(slug)
+        if row is None:
+            return None, None
+        return row, snap.gallery_images[slug]
+
+    def search(self, q, limit=None):
+        """Case-insensitive substring match on name, short_desc and description, ordered by name"""
+        q = q.lower()
+        results = []
+        for r, name, short_desc, description in self.get().search_rows:
+            if q in name or q in short_desc or q in description:
+                results.append(r)
+                if limit and len(results) >= limit:
+                    break
+        return results
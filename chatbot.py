@@ -0,0 +1,251 @@
+"""
+Server-side responder for the site chatbot (/chat).
+
+The intents below used to be a chain of msg.includes(...) checks in
+static/js/chatbot.js. Here they are compiled once into an inverted keyword
+index - each keyword (a word or a phrase) is filed under its first word - so
+a message is matched in a single pass over its words. When several intents
+match, the one listed first wins, the same priority the old script had.
+Keywords match whole words ("hi" no longer fires on "which" or "this").
+
+Questions that name a product ("price of the hot air blower") are answered
+from the live catalog snapshot: name, short description and a link to the
+product page, plus the list price from products_data (the services table
+has no price column). Answers are cached per normalized message until the
+catalog version changes.
+"""
+import threading
+from collections import OrderedDict
+
+from autocomplete import normalize
+from products_data import PRODUCTS
+
+# Highest priority first. page: endpoint linked under the reply (or None);
+# catalog=True intents are better answered by a product the message names.
+INTENTS = [
+    # Greetings
+    dict(name='greeting', catalog=True, page=None,
+         keywords=['hi', 'hello', 'hey'],
+         reply='Hello! 👋 Welcome to OM Industries. What can I help you with today?'),
+    # Company info
+    dict(name='about', catalog=False, page='about',
+         keywords=['who are you', 'about om', 'who is om'],
+         reply='OM Industries is a trusted manufacturer of high-quality industrial equipment and hydraulic solutions for CNG cylinder testing.'),
+    dict(name='location', catalog=False, page='contact',
+         keywords=['location', 'where are you', 'address'],
+         reply='We are based in India. Please visit our Contact page for complete address and directions.'),
+    dict(name='established', catalog=False, page='about',
+         keywords=['established', 'founded', 'since'],
+         reply='OM Industries has years of experience in manufacturing and supplying industrial solutions.'),
+    # Products
+    dict(name='products', catalog=True, page='services',
+         keywords=['product', 'what do you', 'manufacture'],
+         reply='We manufacture: CNG Cylinder Testing Equipment, Hydraulic Pumps, Water Jackets, Ultrasonic Rollers, Control Panels, and more industrial equipment.'),
+    dict(name='hydraulic', catalog=True, page='services',
+         keywords=['hydraulic', 'pump', 'hydro'],
+         reply='Yes! We specialize in high-performance hydraulic equipment and pumps. Check our Services page for detailed specs.'),
+    dict(name='cylinder', catalog=True, page='services',
+         keywords=['cylinder'],
+         reply='We offer CNG cylinder testing equipment with complete solutions including water jackets, fire stands, and testing plants.'),
+    dict(name='specifications', catalog=True, page='services',
+         keywords=['specifications', 'specs'],
+         reply='Detailed specifications are available on each product page. Want to know about a specific product?'),
+    dict(name='custom', catalog=False, page='contact',
+         keywords=['custom', 'customize', 'customized', 'tailor', 'tailored'],
+         reply='Yes! We provide customized solutions based on your requirements. Contact our sales team for details.'),
+    # Pricing & orders
+    dict(name='price', catalog=True, page='contact',
+         keywords=['price', 'cost', 'rate', 'quotation', 'quote'],
+         reply='Pricing varies by product and specifications. Please contact us or fill the inquiry form for a customized quotation.'),
+    dict(name='order', catalog=False, page='contact',
+         keywords=['order', 'purchase', 'buy'],
+         reply='You can place an order by contacting us through the website inquiry form, email, or phone. Our sales team will assist you.'),
+    dict(name='bulk', catalog=False, page='contact',
+         keywords=['bulk', 'wholesale', 'distributor'],
+         reply='We offer special pricing for bulk orders. Please contact our sales team for wholesale and distributor inquiries.'),
+    dict(name='moq', catalog=False, page='contact',
+         keywords=['minimum', 'moq'],
+         reply='Minimum order quantity depends on the product. Contact our sales team for specific MOQ details.'),
+    # Shipping & delivery
+    dict(name='shipping', catalog=False, page=None,
+         keywords=['shipping', 'delivery', 'deliver', 'ship'],
+         reply='We deliver across India with reliable shipping options. Delivery time depends on your location and order size.'),
+    dict(name='export', catalog=False, page='contact',
+         keywords=['export', 'international'],
+         reply='Yes, we export to international markets. Contact us for export inquiries and documentation.'),
+    # Support & service
+    dict(name='support', catalog=False, page='contact',
+         keywords=['support', 'help', 'assist'],
+         reply='We provide comprehensive support including installation guidance, technical assistance, and after-sales service. How can we help?'),
+    dict(name='installation', catalog=False, page='contact',
+         keywords=['install', 'installation', 'setup'],
+         reply='We provide technical installation guidance and support. Our team can help you with setup and troubleshooting.'),
+    dict(name='warranty', catalog=False, page='contact',
+         keywords=['warranty', 'guarantee'],
+         reply='Warranty details depend on the product. Check the product page or contact us for specific warranty information.'),
+    dict(name='problem', catalog=False, page='contact',
+         keywords=['problem', 'issue', 'trouble', 'broken'],
+         reply='Sorry to hear that! Please describe your issue and product details. Our technical team will assist you right away.'),
+    dict(name='after_sales', catalog=False, page='contact',
+         keywords=['after sales', 'maintenance'],
+         reply='We provide reliable after-sales support including maintenance guidance and spare parts availability.'),
+    # Contact
+    dict(name='contact', catalog=False, page='contact',
+         keywords=['contact', 'email', 'phone', 'call'],
+         reply='You can reach us through our Contact page. We also have email and phone support available during business hours.'),
+    dict(name='phone', catalog=False, page='contact',
+         keywords=['mobile'],
+         reply="Our phone numbers are listed on the Contact page. We're happy to discuss your requirements!"),
+    # Quality & certification
+    dict(name='certification', catalog=False, page=None,
+         keywords=['certificate', 'certified', 'iso'],
+         reply='Yes, our products meet industry quality standards and certifications. Contact us for specific compliance details.'),
+    dict(name='quality', catalog=True, page=None,
+         keywords=['test', 'tested', 'quality'],
+         reply='All products are thoroughly tested before dispatch to ensure quality and reliability.'),
+    # Services
+    dict(name='services', catalog=True, page='services',
+         keywords=['service', 'testing', 'cng'],
+         reply='We provide CNG hydro plant testing, manufacturing, and complete industrial solutions. What specific service interests you?'),
+]
+
+CLARIFY = "Could you please provide more details? I'm here to help with product info, pricing, shipping, or support."
+FALLBACK = ("Great question! I didn't quite understand. Could you ask about: Products, Pricing, Shipping, "
+            "Support, or Contact information?")
+
+# Product-name words too common to identify a product on their own
+_NAME_STOPWORDS = {'and', 'for', 'the', 'with', 'inch'}
+
+
+def _singular(word):
+    return word[:-1] if len(word) > 3 and word.endswith('s') and not word.endswith('ss') else word
+
+
+class KeywordIndex:
+    """first word -> [(keyword words, intent position)]"""
+
+    def __init__(self, intents):
+        self.intents = intents
+        self._index = {}
+        for position, intent in enumerate(intents):
+            for keyword in intent['keywords']:
+                words = tuple(normalize(keyword))
+                self._index.setdefault(words[0], []).append((words, position))
+        for entries in self._index.values():
+            entries.sort(key=lambda entry: entry[1])
+
+    def match(self, words):
+        """The highest-priority intent any keyword of the message hits, or None"""
+        best = len(self.intents)
+        for i, word in enumerate(words):
+            entries = self._index.get(word) or self._index.get(_singular(word), ())
+            for keyword, position in entries:
+                if position >= best:
+                    break
+                if len(keyword) == 1 or tuple(words[i:i + len(keyword)]) == keyword:
+                    best = position
+                    break
+        return self.intents[best] if best < len(self.intents) else None
+
+
+class ProductIndex:
+    """Name word -> products, for spotting the product a message is about"""
+
+    def __init__(self, rows):
+        self._postings = {}
+        self._name_words = {}
+        for row in rows:
+            words = {_singular(w) for w in normalize(row.get('name'))
+                     if len(w) >= 3 and not w.isdigit() and w not in _NAME_STOPWORDS}
+            self._name_words[row['slug']] = words
+            for word in words:
+                self._postings.setdefault(word, []).append(row)
+
+    def match(self, words):
+        """Best-matching rows (several on a tie), or []. A product matches when the
+        message has two of its name words, or one word no other product uses."""
+        hits = {}
+        for word in {_singular(w) for w in words}:
+            rows = self._postings.get(word, ())
+            for row in rows:
+                entry = hits.setdefault(row['slug'], [row, 0, 0.0])
+                entry[1] += 1
+                entry[2] += 1.0 / len(rows)
+        matched = [(row, score) for row, count, score in hits.values()
+                   if count >= 2 or score == 1.0]
+        if not matched:
+            return []
+        best = max(score for _, score in matched)
+        return [row for row, score in matched if score >= best - 1e-9]
+
+
+class ChatResponder:
+    def __init__(self, intents=INTENTS, cache_size=1024):
+        self.keywords = KeywordIndex(intents)
+        self._lock = threading.Lock()
+        self.version = None
+        self._products = ProductIndex([])
+        self._answers = OrderedDict()       # normalized message -> answer (LRU)
+        self._cache_size = cache_size
+        self.counters = {'hits': 0, 'misses': 0}
+
+    def sync(self, rows, version):
+        """Rebuild the product index (and drop cached answers) when the catalog changes"""
+        with self._lock:
+            if version == self.version:
+                return
+            self._products = ProductIndex(rows)
+            self._answers.clear()
+            self.version = version
+
+    def answer(self, message, url_for):
+        """{'reply': str, 'intent': str, 'links': [{'label', 'url'}]} for a visitor message"""
+        words = normalize(message)
+        key = ' '.join(words)
+        with self._lock:
+            answer = self._answers.get(key)
+            if answer is not None:
+                self._answers.move_to_end(key)
+                self.counters['hits'] += 1
+                return answer
+            self.counters['misses'] += 1
+            products = self._products
+        answer = self._answer(message, words, products, url_for)
+        if not words:
+            # Punctuation-only messages all normalize to '', but the reply depends on their length
+            return answer
+        with self._lock:
+            self._answers[key] = answer
+            if len(self._answers) > self._cache_size:
+                self._answers.popitem(last=False)
+        return answer
+
+    def _answer(self, message, words, products, url_for):
+        intent = self.keywords.match(words)
+        rows = products.match(words) if intent is None or intent['catalog'] else []
+        if len(rows) == 1:
+            row = rows[0]
+            reply = f"{row['name']}: {row.get('short_desc') or ''}".strip()
+            price = PRODUCTS.get(row['slug'], {}).get('price')
+            if price:
+                reply += f" Price: {price}."
+            return {'reply': reply, 'intent': 'product',
+                    'links': [{'label': row['name'], 'url': url_for('product_detail', slug=row['slug'])}]}
+        if rows:
+            names = [row['name'] for row in rows[:3]]
+            return {'reply': f"We have several matching products: {', '.join(names)}. Which one would you like to know about?",
+                    'intent': 'products',
+                    'links': [{'label': row['name'], 'url': url_for('product_detail', slug=row['slug'])}
+                              for row in rows[:3]]}
+        if intent is not None:
+            links = []
+            if intent['page']:
+                links.append({'label': intent['page'].capitalize(), 'url': url_for(intent['page'])})
+            return {'reply': intent['reply'], 'intent': intent['name'], 'links': links}
+        if len(message.strip()) < 3:
+            return {'reply': CLARIFY, 'intent': 'clarify', 'links': []}
+        return {'reply': FALLBACK, 'intent': 'fallback', 'links': []}
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, cached=len(self._answers), intents=len(self.keywords.intents))
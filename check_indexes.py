@@ -0,0 +1,146 @@
+"""
+Check: does any route's query fall back to a full table scan?
+
+Builds a throw-away SQLite database through the app's migrations, seeds it,
+then requests every page (public and admin) plus one outbox sender pass
+while recording each SQL statement the app runs. Each recorded statement
+is run through EXPLAIN QUERY PLAN, and the check fails if the plan scans a
+table without an index, unless ALLOWED_SCANS lists it with a reason.
+
+Also fails if a declared index (migrations.INDEXES) is missing.
+
+Run: python check_indexes.py        (exit status 1 on failure)
+PostgreSQL gets the same declared indexes; its planner is not checked here
+because it picks sequential scans for small tables regardless.
+"""
+import os
+import re
+import sys
+import tempfile
+
+# Scans that are correct by design: (pattern in the SQL, reason)
+ALLOWED_SCANS = [
+    ("SELECT f.*, c.*, o.*", "dashboard counters aggregate whole tables (cached, see metrics.py)"),
+    ("GROUP BY status", "admin email stats count the outbox by status"),
+    ("SELECT COUNT(*) AS cnt FROM services", "seed check in migration 6, runs once"),
+    ("WHERE 1 = 0", "column probe in metrics.py, reads no rows"),
+]
+
+_SCAN_RE = re.compile(r'^SCAN (\w+)$')
+
+
+def _setup(tmp):
+    os.chdir(tmp)                                  # app.py uses ./database.db
+    os.environ.pop('DATABASE_URL', None)
+    os.environ.update({
+        'OUTBOX_SENDER': 'off', 'SQLITE_MAINTENANCE_SECONDS': '0',
+        'CATALOG_VERSION_FILE': os.path.join(tmp, '.catalog_version'),
+        'INVOICE_CACHE_DIR': os.path.join(tmp, 'invoice_cache'),
+        # The sender fails to connect at once, which exercises the retry path too
+        'SMTP_SERVER': '127.0.0.1', 'SMTP_PORT': '9', 'SMTP_USER': 'check@example.com',
+        'SMTP_PASSWORD': 'x', 'RECIPIENT_EMAIL': 'admin@example.com',
+    })
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import app
+    app.ensure_db()
+    return app
+
+
+def _seed(app):
+    conn = app._db_connection()
+    for i in range(1, 201):
+        app.execute_query(conn, "INSERT INTO orders (name, address, phone, email, quantity, order_date, status, price) "
+                                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                          (f'Customer {i}', 'Delhi', '99999', 'c@example.com', 1, f'2025-01-{i % 28 + 1:02d}',
+                           'process', 1000))
+        app.execute_query(conn, "INSERT INTO order_status_log (order_id, status) VALUES (?, 'process')", (i,))
+        app.execute_query(conn, "INSERT INTO feedback (name, rating, message, status) VALUES (?, 5, 'Good', ?)",
+                          (f'F {i}', 'approved' if i % 2 else 'pending'))
+        app.execute_query(conn, "INSERT INTO contacts (name, email, phone, message) VALUES (?, 'c@example.com', '1', 'Hi')",
+                          (f'C {i}',))
+    conn.commit()
+    conn.close()
+    app.catalog.invalidate()
+
+
+def _crawl(app):
+    client = app.app.test_client()
+    slug = app.catalog.get().rows[0]['slug']
+    urls = ['/', '/services', f'/services/product/{slug}', '/feedback', '/contact',
+            '/search?q=cylinder', '/search-results?q=hydro test']
+    for url in urls:
+        client.get(url)
+    client.post('/contact', data={'name': 'Check', 'email': 'c@example.com', 'phone': '1', 'message': 'Hello'})
+    client.post('/feedback', data={'name': 'Check', 'rating': '5', 'message': 'Hello'})
+    with client.session_transaction() as s:
+        s['admin_logged_in'] = True
+    admin = ['/admin/dashboard', '/admin/email-stats', '/admin/orders?per_page=20', '/admin/orders/5',
+             '/admin/contacts?per_page=20', '/admin/feedback?per_page=20', '/admin/services?per_page=10',
+             '/admin/orders/invoices/export?from=2025-01-02&to=2025-01-02',
+             '/admin/orders/export?format=csv', '/admin/orders/export?from=2025-01-02&to=2025-01-09&status=process',
+             '/admin/contacts/export?format=xlsx&from=2025-01-01',
+             '/admin/feedback/export?from=2025-01-01&to=2030-12-31&status=approved']
+    for url in admin:
+        client.get(url).get_data()                 # exports run their query as the body is read
+    # Second pages (the keyset cursor queries)
+    for url in ('/admin/orders?per_page=20', '/admin/contacts?per_page=20', '/admin/feedback?per_page=20',
+                '/admin/services?per_page=10'):
+        match = re.search(r'href="([^"]*after=[^"]*)"', client.get(url).get_data(as_text=True))
+        if match:
+            client.get(match.group(1).replace('&amp;', '&'))
+    client.post('/admin/orders/5/update-status', data={'status': 'shipped'})
+    app.outbox.drain_once()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        app = _setup(tmp)
+        _seed(app)
+
+        statements = []
+        connect = app.db_pool._connect
+
+        def traced_connect():
+            conn = connect()
+            conn.set_trace_callback(statements.append)
+            return conn
+
+        app.db_pool.close_all()
+        app.db_pool._connect = traced_connect
+        _crawl(app)
+        app.db_pool._connect = connect
+        app.db_pool.close_all()
+
+        conn = app._connect_sqlite()
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        failures = []
+        checked = set()
+        for sql in statements:
+            sql = ' '.join(sql.split())
+            if sql in checked or not re.match(r'(SELECT|UPDATE|DELETE|WITH)\b', sql, re.I) or 'sqlite_master' in sql:
+                continue
+            checked.add(sql)
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+            scans = [m.group(1) for m in map(_SCAN_RE.match, plan) if m and m.group(1) in tables]
+            if not scans:
+                continue
+            allowed = next((reason for pattern, reason in ALLOWED_SCANS if pattern in sql), None)
+            if allowed:
+                print(f"ok (allowed: {allowed}): full scan of {', '.join(scans)}")
+            else:
+                failures.append(f"full scan of {', '.join(scans)} in: {sql[:160]}")
+        missing = app.missing_indexes(conn, postgres=False)
+        conn.close()
+
+    print(f"Checked {len(checked)} distinct statements")
+    if missing:
+        failures.append(f"declared indexes missing: {', '.join(missing)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK: no route query falls back to a full table scan")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,238 @@
+"""
+Unused-CSS purge and critical-CSS extraction for the public pages.
+
+The purge keeps a rule only if every class and id in at least one of its
+selectors appears somewhere in templates/public/** or static/js/*.js
+(selectors of a kept rule that are unused are dropped too). Scanning is
+token-based and deliberately generous: any word in a template or script
+counts as used, so classes added at runtime by Bootstrap's own JavaScript
+survive. Classes built from pieces, like alert-{{ category }} or
+`${sender}-message`, keep every class with that prefix or suffix.
+
+Critical CSS is the subset of the (purged) stylesheets that applies to the
+first screen of a page: the header and the first <section> of <main>.
+A rule is critical if the classes, ids and element names of one of its
+selectors all occur in that markup; :hover/:focus-style states and
+@keyframes are left to the full stylesheet, which loads asynchronously.
+
+This is a text-level approximation, not a browser: it never checks
+selector structure (descendant vs child), which errs on the side of
+keeping rules.
+"""
+import re
+
+_WORD = re.compile(r'[A-Za-z_][\w-]*')
+# prefix-{{ expr }} / {{ expr }}-suffix in templates, prefix-${expr} / ${expr}-suffix in JS
+_PARTIAL = re.compile(r'([\w-]*)(?:\{\{.*?\}\}|\{%.*?%\}|\$\{[^}]*\})([\w-]*)')
+_CLASS = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+_ID = re.compile(r'#(-?[_a-zA-Z][\w-]*)')
+_TYPE = re.compile(r'(?:^|[\s>+~(])([a-zA-Z][\w-]*)')
+_ATTRIBUTE = re.compile(r'\[[^\]]*\]')
+_INTERACTIVE = re.compile(r':(hover|focus|focus-visible|focus-within|active|visited|checked|disabled|invalid|valid|'
+                          r'indeterminate|placeholder-shown|autofill)\b|::?(placeholder|selection|-webkit-[\w-]+|-moz-[\w-]+)')
+# Block at-rules whose children are rules (filtered one by one); any other
+# at-rule with a block (@keyframes, @font-face) is kept or dropped whole
+_GROUPING = ('@media', '@supports', '@container', '@layer')
+
+
+class UsedNames:
+    """Words found in templates/scripts, plus prefixes/suffixes of built-up class names"""
+
+    def __init__(self):
+        self.words = set()
+        self.prefixes = set()
+        self.suffixes = set()
+
+    def scan(self, text):
+        self.words.update(_WORD.findall(text))
+        for prefix, suffix in _PARTIAL.findall(text):
+            if prefix.endswith('-'):
+                self.prefixes.add(prefix)
+            if suffix.startswith('-'):
+                self.suffixes.add(suffix)
+
+    def __contains__(self, name):
+        return (name in self.words or any(name.startswith(p) for p in self.prefixes)
+                or any(name.endswith(s) for s in self.suffixes))
+
+
+def _strip_comments(text):
+    out = []
+    i, n = 0, len(text)
+    while i < n:
+        c = text[i]
+        if c in '"\'':
+            j = _string_end(text, i)
+            out.append(text[i:j])
+            i = j
+        elif text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            i = n if end < 0 else end + 2
+        else:
+            out.append(c)
+            i += 1
+    return ''.join(out)
+
+
+def _string_end(text, i):
+    quote = text[i]
+    i += 1
+    while i < len(text) and text[i] != quote:
+        i += 2 if text[i] == '\\' else 1
+    return i + 1
+
+
+def _block_end(text, i):
+    """Index of the '}' closing the '{' at i"""
+    depth = 0
+    while i < len(text):
+        c = text[i]
+        if c in '"\'':
+            i = _string_end(text, i)
+            continue
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    raise ValueError('unbalanced braces in stylesheet')
+
+
+def parse(text):
+    """Stylesheet -> nodes: ('rule', prelude, body) | ('group', prelude, [nodes]) | ('statement', text)"""
+    nodes, _ = _parse_block(_strip_comments(text), 0)
+    return nodes
+
+
+def _parse_block(text, i):
+    nodes = []
+    start = i
+    while i < len(text):
+        c = text[i]
+        if c in '"\'':
+            i = _string_end(text, i)
+            continue
+        if c == ';':
+            if text[start:i].strip():
+                nodes.append(('statement', text[start:i + 1].strip()))
+            start = i + 1
+        elif c == '{':
+            prelude = text[start:i].strip()
+            if prelude.split(None, 1)[0] in _GROUPING:
+                children, i = _parse_block(text, i + 1)
+                nodes.append(('group', prelude, children))
+            else:
+                end = _block_end(text, i)
+                nodes.append(('rule', prelude, text[i + 1:end]))
+                i = end
+            start = i + 1
+        elif c == '}':
+            return nodes, i
+        i += 1
+    return nodes, i
+
+
+def serialize(nodes):
+    out = []
+    for node in nodes:
+        if node[0] == 'statement':
+            out.append(node[1])
+        elif node[0] == 'rule':
+            out.append(f'{node[1]}{{{node[2]}}}')
+        elif node[2]:
+            out.append(f'{node[1]}{{{serialize(node[2])}}}')
+    return ''.join(out)
+
+
+def split_selectors(prelude):
+    """Split a selector list on top-level commas (not those inside :is(...))"""
+    parts, depth, start = [], 0, 0
+    for i, c in enumerate(prelude):
+        if c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif c == ',' and depth == 0:
+            parts.append(prelude[start:i])
+            start = i + 1
+    parts.append(prelude[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _without_negations(selector):
+    """Drop the arguments of :not(...) - a negated class need not be used"""
+    out, i = [], 0
+    while i < len(selector):
+        if selector.startswith(':not(', i):
+            depth, i = 1, i + 5
+            while i < len(selector) and depth:
+                depth += {'(': 1, ')': -1}.get(selector[i], 0)
+                i += 1
+        else:
+            out.append(selector[i])
+            i += 1
+    return ''.join(out)
+
+
+def _names(selector):
+    s = _without_negations(_ATTRIBUTE.sub('', selector))
+    return _CLASS.findall(s), _ID.findall(s), _TYPE.findall(re.sub(r'::?[\w-]+(\([^)]*\))?', ' ', s))
+
+
+def _filter(nodes, keep_selector, keep_other):
+    """Nodes with each rule's selector list reduced to the kept selectors"""
+    out = []
+    for node in nodes:
+        if node[0] == 'group':
+            children = _filter(node[2], keep_selector, keep_other)
+            if children:
+                out.append(('group', node[1], children))
+        elif node[0] == 'rule' and not node[1].startswith('@'):
+            selectors = [s for s in split_selectors(node[1]) if keep_selector(s)]
+            if selectors:
+                out.append(('rule', ','.join(selectors), node[2]))
+        elif keep_other(node):
+            out.append(node)
+    return out
+
+
+def purge(css, used):
+    """Stylesheet text without the rules no template or script can match"""
+    def keep(selector):
+        classes, ids, _ = _names(selector)
+        return all(c in used for c in classes) and all(i in used for i in ids)
+    return serialize(_filter(parse(css), keep, lambda node: True))
+
+
+_MARKUP_CLASSES = re.compile(r'\bclass\s*=\s*"([^"]*)"|\bclass\s*=\s*\'([^\']*)\'')
+_MARKUP_IDS = re.compile(r'\bid\s*=\s*"([^"]*)"')
+_MARKUP_TAGS = re.compile(r'<([a-zA-Z][\w-]*)')
+
+
+def above_the_fold(html):
+    """Markup of the first screen: everything up to the end of the first <section> in <main>"""
+    main = html.find('<main')
+    end = html.find('</section>', main) if main >= 0 else -1
+    if end < 0:
+        end = (main if main >= 0 else 0) + 20000
+    return html[:end]
+
+
+def critical(css, html):
+    """The rules of a stylesheet that apply to the first screen of a rendered page"""
+    fold = above_the_fold(html)
+    classes = {c for groups in _MARKUP_CLASSES.findall(fold) for value in groups for c in value.split()}
+    ids = set(_MARKUP_IDS.findall(fold))
+    tags = {t.lower() for t in _MARKUP_TAGS.findall(fold)} | {'html', 'body', ':root'}
+
+    def keep(selector):
+        if _INTERACTIVE.search(selector):
+            return False
+        if selector.startswith(':root') or selector == '*' or selector.startswith(('*,', '*::')):
+            return True
+        sel_classes, sel_ids, sel_tags = _names(selector)
+        return (all(c in classes for c in sel_classes) and all(i in ids for i in sel_ids)
+                and all(t.lower() in tags for t in sel_tags))
+    return serialize(_filter(parse(css), keep, lambda node: False))
@@ -0,0 +1,247 @@
+"""
+Connection pool used by app.py for both PostgreSQL (Supabase) and SQLite.
+
+Instead of opening a new connection for every request, app.py checks a
+connection out of the pool; conn.close() hands it back. Anything a route
+forgets to close is returned when the Flask app context is torn down.
+
+Settings (environment variables, all optional):
+    DB_POOL_MIN            connections kept open even when idle   (default 1)
+    DB_POOL_MAX            hard limit of open connections          (default 10)
+    DB_POOL_TIMEOUT        seconds to wait for a free connection   (default 10)
+    DB_POOL_IDLE_TIMEOUT   close idle connections after N seconds  (default 300)
+    DB_POOL_CHECK_AFTER    health-check a connection on checkout if it has
+                           been idle for more than N seconds       (default 30)
+"""
+import logging
+import os
+import threading
+import time
+
+from logs import log_event
+
+log = logging.getLogger(__name__)
+
+
+class PoolExhausted(Exception):
+    """Raised when no connection became free within the checkout timeout"""
+
+
+class _PoolEntry:
+    """A physical connection plus bookkeeping"""
+    __slots__ = ('conn', 'created_at', 'last_used')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class PooledConnection:
+    """Wrapper handed out by the pool - behaves like the real connection,
+    but close() gives the connection back to the pool instead of closing it"""
+
+    def __init__(self, pool, entry):
+        self._pool = pool
+        self._entry = entry
+
+    @property
+    def raw(self):
+        """The underlying psycopg2 / sqlite3 connection"""
+        if self._entry is None:
+            raise RuntimeError("Connection already returned to the pool")
+        return self._entry.conn
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    @property
+    def released(self):
+        return self._entry is None
+
+    def close(self):
+        """Return the connection to the pool (safe to call twice)"""
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool._return(entry)
+
+
+class ConnectionPool:
+    """Thread-safe pool of DB connections with min/max size, health checks
+    on checkout and idle eviction"""
+
+    def __init__(self, connect, ping, minconn=1, maxconn=10, timeout=10.0,
+                 idle_timeout=300.0, check_after=30.0, name='db'):
+        if maxconn < 1:
+            raise ValueError("maxconn must be at least 1")
+        self.name = name
+        self._connect = connect        # () -> new raw connection
+        self._ping = ping              # (conn) -> None, raises if connection is dead
+        self.minconn = max(0, min(minconn, maxconn))
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.check_after = check_after
+
+        self._lock = threading.Condition()
+        self._idle = []                # LIFO stack of _PoolEntry
+        self._open = 0                 # idle + checked out
+        self._pid = os.getpid()
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'timeouts': 0,
+            'created': 0,
+            'closed': 0,
+            'evicted_idle': 0,
+            'health_check_failures': 0,
+            'max_in_use': 0,
+        }
+
+    # ---- checkout / return ----
+    def acquire(self):
+        """Check out a connection, waiting up to `timeout` seconds"""
+        self._check_fork()
+        deadline = None
+        waited_since = None
+        with self._lock:
+            while True:
+                self._evict_idle_locked()
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._open < self.maxconn:
+                    self._open += 1
+                    entry = None
+                    break
+                if deadline is None:
+                    deadline = time.monotonic() + self.timeout
+                    waited_since = time.monotonic()
+                    self._stats['waits'] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    self._stats['wait_time_total'] += time.monotonic() - waited_since
+                    raise PoolExhausted(
+                        f"No free {self.name} connection after {self.timeout}s "
+                        f"(max {self.maxconn} in use)")
+                self._lock.wait(remaining)
+            if waited_since is not None:
+                self._stats['wait_time_total'] += time.monotonic() - waited_since
+
+        # Connect / health check outside the lock - both can be slow
+        if entry is None:
+            entry = self._new_entry()
+        elif time.monotonic() - entry.last_used > self.check_after:
+            try:
+                self._ping(entry.conn)
+            except Exception as e:
+                log_event(log, 'db.pool_reconnect', logging.WARNING, pool=self.name, error=str(e))
+                with self._lock:
+                    self._stats['health_check_failures'] += 1
+                self._discard(entry.conn)
+                entry = self._new_entry()
+
+        with self._lock:
+            self._stats['checkouts'] += 1
+            in_use = self._open - len(self._idle)
+            if in_use > self._stats['max_in_use']:
+                self._stats['max_in_use'] = in_use
+        return PooledConnection(self, entry)
+
+    def _new_entry(self):
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._lock:
+                self._open -= 1
+                self._lock.notify()
+            raise
+        with self._lock:
+            self._stats['created'] += 1
+        return _PoolEntry(conn)
+
+    def _return(self, entry):
+        if os.getpid() != self._pid:
+            return
+        try:
+            # Never hand out a connection with a half-finished transaction
+            entry.conn.rollback()
+        except Exception:
+            self._discard(entry.conn)
+            with self._lock:
+                self._open -= 1
+                self._lock.notify()
+            return
+        entry.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(entry)
+            self._evict_idle_locked()
+            self._lock.notify()
+
+    # ---- maintenance ----
+    def _evict_idle_locked(self):
+        """Close connections idle for longer than idle_timeout, keeping minconn"""
+        if not self._idle or self.idle_timeout <= 0:
+            return
+        now = time.monotonic()
+        # Oldest entries sit at the bottom of the LIFO stack
+        while self._idle and self._open > self.minconn and now - self._idle[0].last_used > self.idle_timeout:
+            entry = self._idle.pop(0)
+            self._open -= 1
+            self._stats['evicted_idle'] += 1
+            self._discard(entry.conn)
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._stats['closed'] += 1
+
+    def _check_fork(self):
+        """After a fork (gunicorn workers) the inherited sockets belong to the
+        parent - forget them without closing and start a fresh pool"""
+        if os.getpid() != self._pid:
+            with self._lock:
+                if os.getpid() != self._pid:
+                    self._pid = os.getpid()
+                    self._idle = []
+                    self._open = 0
+
+    def close_all(self):
+        """Close every idle connection (checked-out ones close on return)"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for entry in idle:
+            self._discard(entry.conn)
+
+    def stats(self):
+        """Snapshot of pool counters, useful for sizing DB_POOL_MIN/MAX"""
+        with self._lock:
+            data = dict(self._stats)
+            data.update({
+                'name': self.name,
+                'min': self.minconn,
+                'max': self.maxconn,
+                'open': self._open,
+                'idle': len(self._idle),
+                'in_use': self._open - len(self._idle),
+            })
+        data['avg_wait_ms'] = round(data['wait_time_total'] * 1000 / data['waits'], 2) if data['waits'] else 0.0
+        data['wait_time_total'] = round(data['wait_time_total'], 4)
+        return data
+
+
+def pool_settings_from_env():
+    """Read DB_POOL_* environment variables"""
+    return {
+        'minconn': int(os.environ.get('DB_POOL_MIN', 1)),
+        'maxconn': int(os.environ.get('DB_POOL_MAX', 10)),
+        'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'idle_timeout': float(os.environ.get('DB_POOL_IDLE_TIMEOUT', 300)),
+        'check_after': float(os.environ.get('DB_POOL_CHECK_AFTER', 30)),
+    }
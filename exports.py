@@ -0,0 +1,255 @@
+"""
+Streaming CSV/XLSX exports of the admin tables (orders, contacts, feedback).
+
+Rows are read in batches instead of all at once:
+
+- PostgreSQL: a named (server-side) cursor, so the result set stays on the
+  server and arrives batch by batch
+- SQLite: fetchmany() on the statement's cursor, which steps the query as
+  rows are requested
+
+and each batch is encoded and handed to the response before the next one
+is read, so an export of any size runs in constant memory and the download
+starts as soon as the header row is written.
+
+The rows are ordered by (date, id), which walks the same composite index
+as the keyset-paginated admin lists (see migrations.INDEXES).
+
+XLSX is written without a spreadsheet library: the workbook is a ZIP of a
+few small XML parts plus one sheet per MAX_XLSX_ROWS rows, and the sheet is
+compressed into the archive as it is generated. Dates are exported as text.
+"""
+import csv
+import io
+import re
+import uuid
+import zipfile
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from invoice import StreamSink
+from metrics import ORDER_STATUSES
+
+FEEDBACK_STATUSES = ('pending', 'approved', 'rejected')
+FORMATS = ('csv', 'xlsx')
+BATCH_SIZE = 2000                   # rows per fetch
+CHUNK_SIZE = 64 * 1024              # bytes buffered before a chunk is yielded
+MAX_XLSX_ROWS = 1048576             # Excel's sheet limit, including the header row
+
+
+class Export:
+    """One exportable table: its columns, date column and optional status filter"""
+
+    def __init__(self, table, date_column, columns, statuses=()):
+        self.table = table
+        self.date_column = date_column
+        self.columns = columns
+        self.statuses = statuses
+
+    def query(self, date_from=None, date_to=None, status=None):
+        """(sql, params) for the rows in [date_from, date_to] (whole days) with the status"""
+        where, params = [], []
+        if date_from:
+            where.append(f"{self.date_column} >= ?")
+            params.append(date_from.isoformat())
+        if date_to:
+            # Timestamps on the last day compare greater than the bare date
+            where.append(f"{self.date_column} < ?")
+            params.append((date_to + timedelta(days=1)).isoformat())
+        if status:
+            if status not in self.statuses:
+                raise ValueError(f"unknown status for {self.table}: {status}")
+            where.append("status = ?")
+            params.append(status)
+        sql = f"SELECT {', '.join(self.columns)} FROM {self.table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return sql + f" ORDER BY {self.date_column}, id", params
+
+
+EXPORTS = {
+    'orders': Export('orders', 'order_date',
+                     ('id', 'name', 'address', 'phone', 'email', 'quantity', 'price', 'order_date', 'status',
+                      'created_at'),
+                     statuses=ORDER_STATUSES),
+    'contacts': Export('contacts', 'date', ('id', 'name', 'email', 'phone', 'message', 'date')),
+    'feedback': Export('feedback', 'date', ('id', 'name', 'rating', 'message', 'status', 'date'),
+                       statuses=FEEDBACK_STATUSES),
+}
+
+
+def parse_date(value):
+    """date from 'YYYY-MM-DD', None if empty; ValueError otherwise"""
+    value = (value or '').strip()
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def stream_rows(execute, conn, query, params, postgres, batch_size=BATCH_SIZE):
+    """Generator of result rows (as tuples), fetched batch_size at a time.
+
+    On PostgreSQL the query runs in a named cursor (it needs the connection's
+    open transaction, which the pool rolls back on return); on SQLite it goes
+    through execute(conn, query, params) like any other statement."""
+    if postgres:
+        cursor = conn.cursor(name=f'export_{uuid.uuid4().hex}')
+        cursor.itersize = batch_size
+        cursor.execute(query.replace('?', '%s'), params)
+    else:
+        cursor = execute(conn, query, params)
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield tuple(row.values()) if isinstance(row, dict) else tuple(row)
+    finally:
+        cursor.close()
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+# Spreadsheet apps run cells starting with these as formulas; contact and
+# feedback messages come from the public forms
+_FORMULA_START = frozenset('=+-@\t\r')
+_SIGNED_NUMBER = re.compile(r'[+-][\d\s().-]*$')    # phone numbers, negative amounts
+
+
+def _csv_cell(text):
+    """Quote a string that would run as a formula"""
+    return text if _SIGNED_NUMBER.match(text) else "'" + text
+
+
+def csv_chunks(columns, rows, chunk_size=CHUNK_SIZE):
+    """Generator of UTF-8 CSV chunks; the BOM makes Excel detect the encoding"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield ('\ufeff' + buffer.getvalue()).encode('utf-8')      # the download starts here
+    buffer.seek(0)
+    buffer.truncate()
+    for row in rows:
+        # csv writes None as '' and other values with str(); only formula-like text changes
+        writer.writerow([_csv_cell(value) if value.__class__ is str and value[:1] in _FORMULA_START else value
+                         for value in row])
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+_NUMBERS = (int, float, Decimal)
+_XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+_XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_SHEET_START = (f'{_XML_HEADER}<worksheet xmlns="{_MAIN_NS}"><sheetViews><sheetView workbookViewId="0">'
+                '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+                '</sheetView></sheetViews><sheetData>')
+_SHEET_END = '</sheetData></worksheet>'
+_STYLES = (f'{_XML_HEADER}<styleSheet xmlns="{_MAIN_NS}">'
+           '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+           '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+           '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+           '<borders count="1"><border/></borders>'
+           '<cellStyleXfs count="1"><xf/></cellStyleXfs>'
+           '<cellXfs count="2"><xf/><xf fontId="1" applyFont="1"/></cellXfs>'
+           '</styleSheet>')
+
+
+def _xlsx_cell(value, style=''):
+    if value.__class__ in _NUMBERS:
+        return f'<c{style}><v>{value}</v></c>'
+    if value is None:
+        return '<c/>'
+    text = escape(_XML_ILLEGAL.sub('', _text(value)))
+    return f'<c t="inlineStr"{style}><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values, style=''):
+    return '<row>' + ''.join(_xlsx_cell(value, style) for value in values) + '</row>'
+
+
+def _workbook_parts(sheets, title):
+    """The package parts that list the sheets, written once their number is known"""
+    names = [title if sheets == 1 else f'{title} {n}' for n in range(1, sheets + 1)]
+    overrides = ''.join(f'<Override PartName="/xl/worksheets/sheet{n}.xml" ContentType="application/'
+                        f'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                        for n in range(1, sheets + 1))
+    return {
+        '[Content_Types].xml': (
+            f'{_XML_HEADER}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            f'{overrides}</Types>'),
+        '_rels/.rels': (
+            f'{_XML_HEADER}<Relationships xmlns="{_PKG_REL_NS}">'
+            f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'),
+        'xl/workbook.xml': (
+            f'{_XML_HEADER}<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}"><sheets>'
+            + ''.join(f'<sheet name="{escape(name)}" sheetId="{n}" r:id="rId{n}"/>'
+                      for n, name in enumerate(names, 1))
+            + '</sheets></workbook>'),
+        'xl/_rels/workbook.xml.rels': (
+            f'{_XML_HEADER}<Relationships xmlns="{_PKG_REL_NS}">'
+            + ''.join(f'<Relationship Id="rId{n}" Type="{_REL_NS}/worksheet" Target="worksheets/sheet{n}.xml"/>'
+                      for n in range(1, sheets + 1))
+            + f'<Relationship Id="rId{sheets + 1}" Type="{_REL_NS}/styles" Target="styles.xml"/>'
+            '</Relationships>'),
+        'xl/styles.xml': _STYLES,
+    }
+
+
+def xlsx_chunks(columns, rows, title='Export', chunk_size=CHUNK_SIZE, max_rows=MAX_XLSX_ROWS):
+    """Generator of XLSX (ZIP) chunks: a bold, frozen header row, then the rows;
+    a new sheet is started every max_rows - 1 rows"""
+    sink = StreamSink()
+    header = _xlsx_row(columns, ' s="1"')
+    sheets = 0
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        rows = iter(rows)
+        row = next(rows, None)
+        while sheets == 0 or row is not None:
+            sheets += 1
+            with archive.open(f'xl/worksheets/sheet{sheets}.xml', 'w', force_zip64=True) as sheet:
+                buffer = [_SHEET_START, header]
+                size, written = 0, 1
+                while row is not None and written < max_rows:
+                    line = _xlsx_row(row)
+                    buffer.append(line)
+                    size += len(line)
+                    written += 1
+                    if size >= chunk_size:
+                        sheet.write(''.join(buffer).encode('utf-8'))
+                        buffer, size = [], 0
+                        chunk = sink.drain()
+                        if chunk:
+                            yield chunk
+                    row = next(rows, None)
+                buffer.append(_SHEET_END)
+                sheet.write(''.join(buffer).encode('utf-8'))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+        for name, xml in _workbook_parts(sheets, title).items():
+            archive.writestr(name, xml)
+    yield sink.drain()
@@ -0,0 +1,21 @@
+"""
+Gunicorn settings - read automatically when gunicorn starts in this directory.
+
+Run: gunicorn 'app:create_app()'
+"""
+import os
+
+
+def on_starting(server):
+    """Runs once in the master process before any worker is forked.
+
+    Imports reportlab and builds the invoice styles and watermark here, so
+    forked workers share those pages instead of each paying for them on
+    their first invoice. Set PREWARM_INVOICES=0 to skip."""
+    if os.environ.get('PREWARM_INVOICES', '1') == '0':
+        return
+    import time
+    from invoice import load_resources
+    start = time.perf_counter()
+    load_resources()
+    server.log.info("Pre-warmed invoice resources in %.0f ms", (time.perf_counter() - start) * 1000)
@@ -0,0 +1,121 @@
+"""
+HTTP conditional requests for public pages: ETag, Last-Modified and 304.
+
+A page's validators are derived from what its HTML depends on, without
+touching the database or Jinja:
+  - the templates: a hash of every file under templates/ and of the asset
+    manifest (computed once per process, or per request when templates
+    auto-reload in debug mode)
+  - the data, for catalog pages: the catalog version (one os.stat of the
+    shared version file, see catalog_cache.py)
+  - the current year, which the footer prints
+
+A request whose If-None-Match (or If-Modified-Since) still matches gets an
+empty 304 before the view runs. Everything else is rendered as usual and
+sent with ETag, Last-Modified and Cache-Control headers.
+
+Settings (environment variables, optional):
+    PAGE_MAX_AGE   seconds browsers and CDNs may reuse a page without asking
+                   (default 0: they keep it but revalidate every time)
+"""
+import hashlib
+import os
+import threading
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, make_response, request
+from werkzeug.http import is_resource_modified
+
+
+class TemplateVersion:
+    """(hash, newest mtime) of every file in a template folder, plus any
+    extra files the rendered HTML depends on (e.g. the asset manifest)"""
+
+    def __init__(self, folder, extra_files=()):
+        self.folder = folder
+        self.extra_files = extra_files
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self, reload=False):
+        version = self._version
+        if version is not None and not reload:
+            return version
+        with self._lock:
+            digest = hashlib.sha256()
+            newest = 0.0
+            for root, dirs, files in os.walk(self.folder):
+                dirs.sort()
+                for name in sorted(files):
+                    path = os.path.join(root, name)
+                    digest.update(os.path.relpath(path, self.folder).encode('utf-8'))
+                    with open(path, 'rb') as f:
+                        digest.update(f.read())
+                    newest = max(newest, os.path.getmtime(path))
+            for path in self.extra_files:
+                if os.path.exists(path):
+                    with open(path, 'rb') as f:
+                        digest.update(f.read())
+                    newest = max(newest, os.path.getmtime(path))
+            self._version = (digest.hexdigest()[:16], newest)
+            return self._version
+
+
+class ConditionalPages:
+    """Decorator factory for public views that answer conditional GETs"""
+
+    def __init__(self, templates, max_age=0):
+        self.templates = templates       # TemplateVersion
+        self.max_age = max_age
+        self.counters = {'not_modified': 0, 'rendered': 0}
+
+    def page(self, data_version=None):
+        """Wrap a view. data_version(**view_args) -> (tag, mtime) of the data the
+        page shows, or None when it is not known yet (the page is then sent
+        without validators). Pages built from templates alone omit it."""
+        def decorate(view):
+            @wraps(view)
+            def wrapper(**view_args):
+                validators = self._validators(data_version, view_args)
+                if validators is None:
+                    return view(**view_args)
+                etag, last_modified = validators
+                if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                    self.counters['not_modified'] += 1
+                    return self._with_headers(current_app.response_class(status=304), etag, last_modified)
+                response = make_response(view(**view_args))
+                if response.status_code != 200:
+                    return response
+                self.counters['rendered'] += 1
+                return self._with_headers(response, etag, last_modified)
+            return wrapper
+        return decorate
+
+    def _validators(self, data_version, view_args):
+        template_tag, mtime = self.templates.get(reload=current_app.jinja_env.auto_reload)
+        parts = [template_tag, request.path, str(datetime.now().year)]
+        if data_version is not None:
+            data = data_version(**view_args)
+            if data is None:
+                return None
+            data_tag, data_mtime = data
+            parts.append(str(data_tag))
+            mtime = max(mtime, data_mtime)
+        # a new year changes the footer, so it counts as a modification too
+        mtime = max(mtime, datetime(datetime.now().year, 1, 1).timestamp())
+        etag = hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()[:32]
+        return etag, datetime.fromtimestamp(int(mtime), tz=timezone.utc)
+
+    def _with_headers(self, response, etag, last_modified):
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.cache_control.public = True
+        if self.max_age > 0:
+            response.cache_control.max_age = self.max_age
+        else:
+            response.cache_control.no_cache = True
+        return response
+
+    def stats(self):
+        return dict(self.counters, max_age=self.max_age)
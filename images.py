@@ -0,0 +1,195 @@
+"""
+Responsive images: resized WebP/AVIF variants of the photos in static/.
+
+The source PNG/JPEG files stay as they are. Variants are produced on demand
+by the /img/<path> route (and ahead of time by `flask build-images`) and
+cached on disk as <name>-<content hash>-<width>.<format>, so a changed
+source image never reuses an old variant and variant URLs can be cached
+forever.
+
+Templates use the srcset helpers (via templates/public/components/picture.html):
+
+    image_srcset('image/about2.png', 'webp')
+        -> "/img/image/about2.png?w=320&fmt=webp&v=1a2b... 320w, ..."
+
+Widths are snapped to the configured list and never exceed the source
+width, so the endpoint cannot be used to generate arbitrary sizes. AVIF is
+offered only when Pillow was built with AVIF support.
+
+Settings (environment variables, optional):
+    IMAGE_CACHE_DIR   where variants live (default: image_cache/ next to app.py)
+    IMAGE_WIDTHS      comma-separated widths (default 160,320,640,960,1280)
+"""
+import hashlib
+import os
+import tempfile
+import threading
+
+SOURCE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+MIMETYPES = {'webp': 'image/webp', 'avif': 'image/avif'}
+QUALITY = {'webp': 80, 'avif': 60}
+DEFAULT_WIDTHS = (160, 320, 640, 960, 1280)
+
+
+def image_settings_from_env():
+    widths = os.environ.get('IMAGE_WIDTHS')
+    return {
+        'widths': tuple(sorted(int(w) for w in widths.split(','))) if widths else DEFAULT_WIDTHS,
+    }
+
+
+def supported_formats():
+    """Variant formats this Pillow build can write, best first"""
+    from PIL import features
+    return tuple(fmt for fmt in ('avif', 'webp') if features.check(fmt))
+
+
+class SourceInfo:
+    def __init__(self, path, stamp, digest, width, height):
+        self.path = path
+        self.stamp = stamp                   # (mtime_ns, size) the digest was taken at
+        self.digest = digest
+        self.width = width
+        self.height = height
+
+
+class ResponsiveImages:
+    def __init__(self, static_folder, cache_dir, widths=DEFAULT_WIDTHS):
+        self.static_folder = static_folder
+        self.cache_dir = cache_dir
+        self.widths = tuple(widths)
+        self._formats = None
+        self._sources = {}                   # filename -> SourceInfo
+        self._lock = threading.Lock()
+        self.counters = {'generated': 0, 'served_from_disk': 0}
+
+    @property
+    def formats(self):
+        if self._formats is None:
+            self._formats = supported_formats()
+        return self._formats
+
+    def source(self, filename):
+        """SourceInfo for a static file, or None if it is missing or not an image.
+        The content hash is recomputed only when the file's mtime or size changes."""
+        if not filename.lower().endswith(SOURCE_EXTENSIONS):
+            return None
+        from werkzeug.security import safe_join
+        path = safe_join(self.static_folder, filename)
+        if path is None:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        stamp = (st.st_mtime_ns, st.st_size)
+        info = self._sources.get(filename)
+        if info is not None and info.stamp == stamp:
+            return info
+        from PIL import Image
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:12]
+        try:
+            with Image.open(path) as im:
+                width, height = im.size
+        except OSError:
+            return None
+        info = SourceInfo(path, stamp, digest, width, height)
+        with self._lock:
+            self._sources[filename] = info
+        return info
+
+    def widths_for(self, info):
+        """Configured widths below the source width, plus the source width itself
+        when it is smaller than the largest configured width"""
+        widths = [w for w in self.widths if w < info.width]
+        if info.width <= self.widths[-1] or not widths:
+            widths.append(min(info.width, self.widths[-1]))
+        return widths
+
+    def snap_width(self, info, width):
+        """The smallest allowed width >= width (or the largest allowed one)"""
+        allowed = self.widths_for(info)
+        return next((w for w in allowed if w >= width), allowed[-1])
+
+    def variant_path(self, info, width, fmt):
+        stem = os.path.splitext(os.path.basename(info.path))[0].replace(' ', '_')
+        return os.path.join(self.cache_dir, f'{stem}-{info.digest}-{width}.{fmt}')
+
+    def variant(self, filename, width, fmt):
+        """Path of the variant file, generating it if needed; None if the source
+        is not an image or the format is not supported"""
+        if fmt not in self.formats:
+            return None
+        info = self.source(filename)
+        if info is None:
+            return None
+        width = self.snap_width(info, width)
+        path = self.variant_path(info, width, fmt)
+        if os.path.exists(path):
+            self.counters['served_from_disk'] += 1
+            return path
+        self._generate(info, width, fmt, path)
+        return path
+
+    def _generate(self, info, width, fmt, path):
+        from PIL import Image, ImageOps
+        with Image.open(info.path) as im:
+            im = ImageOps.exif_transpose(im)
+            if im.mode not in ('RGB', 'RGBA'):
+                im = im.convert('RGBA' if 'transparency' in im.info or im.mode in ('LA', 'PA', 'P') else 'RGB')
+            if im.width > width:
+                im = im.resize((width, max(1, round(im.height * width / im.width))), Image.LANCZOS)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Written under a temp name and renamed, so concurrent requests
+            # for the same variant never see a half-written file
+            fd, tmp_path = tempfile.mkstemp(suffix=f'.{fmt}.tmp', dir=self.cache_dir)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    im.save(f, format=fmt.upper(), quality=QUALITY[fmt])
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        self.counters['generated'] += 1
+
+    def srcset(self, filename, fmt, url_for):
+        """srcset attribute value for one format ('' if there are no variants)"""
+        if fmt not in self.formats:
+            return ''
+        info = self.source(filename)
+        if info is None:
+            return ''
+        return ', '.join(f"{url_for('image_variant', filename=filename, w=w, fmt=fmt, v=info.digest)} {w}w"
+                         for w in self.widths_for(info))
+
+    def image_set(self, filename, width, url_for):
+        """CSS image-set() of the variants at one width ('' if there are none)"""
+        info = self.source(filename)
+        if info is None or not self.formats:
+            return ''
+        width = self.snap_width(info, width)
+        variants = [f"url('{url_for('image_variant', filename=filename, w=width, fmt=fmt, v=info.digest)}') "
+                    f"type('{MIMETYPES[fmt]}')" for fmt in self.formats]
+        return f"image-set({', '.join(variants)})"
+
+    def sources(self, filename):
+        """Every static image under a folder (relative to static/), for the build step"""
+        root = os.path.join(self.static_folder, filename)
+        for dirpath, dirs, files in os.walk(root):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(SOURCE_EXTENSIONS):
+                    yield os.path.relpath(os.path.join(dirpath, name), self.static_folder).replace(os.sep, '/')
+
+    def build(self, filename, fmt):
+        """Generate every width of one image in one format; returns {width: bytes}"""
+        info = self.source(filename)
+        if info is None or fmt not in self.formats:
+            return {}
+        return {w: os.path.getsize(self.variant(filename, w, fmt)) for w in self.widths_for(info)}
+
+    def stats(self):
+        return dict(self.counters, formats=list(self.formats), widths=list(self.widths),
+                    sources_hashed=len(self._sources))
@@ -0,0 +1,221 @@
+"""
+Per-request instrumentation and the Prometheus /metrics exposition.
+
+Every request records, per endpoint:
+- its latency (histogram, with p50/p95/p99 estimated from the buckets)
+- the number and total time of the queries it ran through execute_query
+- time spent waiting for a pooled database connection
+- time spent rendering templates (a render-cache hit renders nothing)
+
+Queries and connection checkouts outside a request (startup, the outbox
+thread, CLI commands) are counted under the endpoint "(background)".
+
+Numbers are per worker process: with several gunicorn workers each one
+serves its own /metrics, so scrape them individually or aggregate with
+the Prometheus server.
+"""
+import threading
+import time
+from contextvars import ContextVar
+
+# Seconds; quantiles are interpolated within these
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+QUANTILES = (0.5, 0.95, 0.99)
+BACKGROUND = '(background)'
+
+_current = ContextVar('request_stats', default=None)
+
+
+class RequestStats:
+    """What one request spent its time on"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.acquire_seconds = 0.0
+        self.render_seconds = 0.0
+        self._render_started = []
+
+    def as_fields(self):
+        return {'queries': self.queries, 'query_ms': round(self.query_seconds * 1000, 2),
+                'acquire_ms': round(self.acquire_seconds * 1000, 2),
+                'render_ms': round(self.render_seconds * 1000, 2)}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)     # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimate like Prometheus' histogram_quantile: linear within the bucket"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+class Instrumentation:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}                 # (endpoint, method, status) -> count
+        self.latency = {}                  # endpoint -> Histogram
+        self.queries_per_request = {}      # endpoint -> Histogram
+        self.query_totals = {}             # endpoint -> [queries, seconds]
+        self.acquire = Histogram(LATENCY_BUCKETS)
+        self.render = {}                   # template -> Histogram
+
+    # ---- recording (called from app.py hooks) ----
+    def start_request(self):
+        return _current.set(RequestStats())
+
+    def finish_request(self, token, endpoint, method, status):
+        """Record the request's numbers; returns its RequestStats and duration"""
+        stats = _current.get()
+        _current.reset(token)
+        elapsed = time.perf_counter() - stats.started
+        endpoint = endpoint or '(unmatched)'
+        with self._lock:
+            key = (endpoint, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self._histogram(self.latency, endpoint, LATENCY_BUCKETS).observe(elapsed)
+            self._histogram(self.queries_per_request, endpoint, QUERY_COUNT_BUCKETS).observe(stats.queries)
+            totals = self.query_totals.setdefault(endpoint, [0, 0.0])
+            totals[0] += stats.queries
+            totals[1] += stats.query_seconds
+        return stats, elapsed
+
+    def record_query(self, query, seconds):
+        stats = _current.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.query_seconds += seconds
+            return
+        with self._lock:
+            totals = self.query_totals.setdefault(BACKGROUND, [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+
+    def record_acquire(self, seconds):
+        stats = _current.get()
+        if stats is not None:
+            stats.acquire_seconds += seconds
+        with self._lock:
+            self.acquire.observe(seconds)
+
+    def render_started(self):
+        stats = _current.get()
+        if stats is not None:
+            stats._render_started.append(time.perf_counter())
+
+    def render_finished(self, template):
+        stats = _current.get()
+        if stats is None or not stats._render_started:
+            return
+        seconds = time.perf_counter() - stats._render_started.pop()
+        if not stats._render_started:      # nested renders count once
+            stats.render_seconds += seconds
+        with self._lock:
+            self._histogram(self.render, template, LATENCY_BUCKETS).observe(seconds)
+
+    @staticmethod
+    def _histogram(table, key, buckets):
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = Histogram(buckets)
+        return histogram
+
+    # ---- reporting ----
+    def prometheus(self):
+        """Text exposition format 0.0.4"""
+        out = []
+        with self._lock:
+            out.append('# HELP http_requests_total Requests served, by endpoint, method and status')
+            out.append('# TYPE http_requests_total counter')
+            for (endpoint, method, status), n in sorted(self.requests.items()):
+                out.append(f'http_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {n}')
+            _histogram_lines(out, 'http_request_duration_seconds', 'Request latency', 'endpoint', self.latency)
+            out.append('# HELP http_request_duration_quantile_seconds Latency quantiles estimated from the histogram')
+            out.append('# TYPE http_request_duration_quantile_seconds gauge')
+            for endpoint, histogram in sorted(self.latency.items()):
+                for q in QUANTILES:
+                    out.append(f'http_request_duration_quantile_seconds{_labels(endpoint=endpoint, quantile=q)} '
+                               f'{_number(histogram.quantile(q))}')
+            _histogram_lines(out, 'db_queries_per_request', 'Queries run by one request', 'endpoint',
+                             self.queries_per_request)
+            out.append('# HELP db_queries_total Queries run through execute_query')
+            out.append('# TYPE db_queries_total counter')
+            for endpoint, (n, _) in sorted(self.query_totals.items()):
+                out.append(f'db_queries_total{_labels(endpoint=endpoint)} {n}')
+            out.append('# HELP db_query_seconds_total Time spent in execute_query')
+            out.append('# TYPE db_query_seconds_total counter')
+            for endpoint, (_, seconds) in sorted(self.query_totals.items()):
+                out.append(f'db_query_seconds_total{_labels(endpoint=endpoint)} {_number(seconds)}')
+            _histogram_lines(out, 'db_connection_acquire_seconds', 'Wait for a pooled connection', None,
+                             {None: self.acquire})
+            _histogram_lines(out, 'template_render_seconds', 'Template render time', 'template', self.render)
+        return '\n'.join(out) + '\n'
+
+    def summary(self):
+        """{endpoint: {count, p50_ms, p95_ms, p99_ms, queries_per_request}} for admin views"""
+        with self._lock:
+            result = {}
+            for endpoint, histogram in sorted(self.latency.items()):
+                entry = {'count': histogram.count}
+                for q in QUANTILES:
+                    value = histogram.quantile(q)
+                    entry[f'p{int(q * 100)}_ms'] = None if value is None else round(value * 1000, 2)
+                queries = self.queries_per_request[endpoint]
+                entry['queries_per_request'] = round(queries.sum / queries.count, 2) if queries.count else 0
+                result[endpoint] = entry
+            return result
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+def _number(value):
+    if value is None:
+        return 'NaN'
+    return repr(float(value))
+
+
+def _histogram_lines(out, name, help_text, label, table):
+    out.append(f'# HELP {name} {help_text}')
+    out.append(f'# TYPE {name} histogram')
+    for key, histogram in sorted(table.items(), key=lambda item: str(item[0])):
+        labels = {label: key} if label else {}
+        cumulative = 0
+        for bound, n in zip(histogram.buckets, histogram.counts):
+            cumulative += n
+            out.append(f'{name}_bucket{_labels(**labels, le=_number(bound))} {cumulative}')
+        out.append(f'{name}_bucket{_labels(**labels, le="+Inf")} {histogram.count}')
+        out.append(f'{name}_sum{_labels(**labels)} {_number(histogram.sum)}')
+        out.append(f'{name}_count{_labels(**labels)} {histogram.count}')
@@ -0,0 +1,508 @@
+"""
+Invoice PDF generation for admin_order_invoice, with an on-disk cache.
+
+The expensive, order-independent parts (reportlab imports, the paragraph
+styles and the decoded watermark logo) are created once per process and
+reused for every invoice.
+
+Generated PDFs are cached on disk as invoice_<order id>_<hash>.pdf, where
+the hash covers the order row, so any change to the order produces a new
+file. Cold generation can be pushed to a background thread; the route then
+answers immediately with a status URL to poll.
+
+Batch export (many orders at once) streams a ZIP of PDFs rendered by a
+process pool, or builds one merged PDF, without buffering every invoice.
+
+Settings (environment variables, optional):
+    INVOICE_CACHE_DIR   where cached PDFs live (default: invoice_cache/ next to app.py)
+    INVOICE_WORKERS     background generation threads (default 1)
+    INVOICE_BATCH_PROCESSES   processes used by batch export (default: CPU count)
+"""
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import deque
+from io import BytesIO
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+WATERMARK_PATH = os.path.join(BASE_DIR, "static", "image", "logoo.png")
+
+# Bump when the invoice layout changes so cached PDFs are regenerated
+INVOICE_LAYOUT_VERSION = '1'
+
+COMPANY_STATE = "Maharashtra"
+
+BANK_DETAILS = [
+    ['Bank Name', 'HDFC BANK'],
+    ['A/C Name', 'OM INDUSTRIES INDIA'],
+    ['A/C Number', '50200094808411'],
+    ['IFSC Code', 'HDFC0000998'],
+    ['Branch', 'LBS MARG VIKH (W)'],
+    ]
+
+# Brand colors (hex, turned into reportlab colors when resources load)
+BRAND_COLORS = {
+    'dark_blue': '#1a365d',
+    'light_grey': '#f7fafc',
+    'border_grey': '#e2e8f0',
+    'text_muted': '#64748b',
+}
+
+_resources = None
+_resources_lock = threading.Lock()
+
+
+def build_styles():
+    """The sample style sheet plus the invoice's paragraph styles"""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    dark_blue = colors.HexColor(BRAND_COLORS['dark_blue'])
+    text_muted = colors.HexColor(BRAND_COLORS['text_muted'])
+
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='InvoiceTitle', fontSize=24, textColor=dark_blue, spaceAfter=2, fontName='Helvetica-Bold'))
+    styles.add(ParagraphStyle(name='CompanyTagline', fontSize=9, textColor=text_muted, spaceAfter=12, fontName='Helvetica'))
+    styles.add(ParagraphStyle(name='SectionLabel', fontSize=8, textColor=text_muted, spaceAfter=4, fontName='Helvetica-Bold'))
+    styles.add(ParagraphStyle(name='CustomerText', fontSize=10, textColor=colors.black, spaceAfter=2, fontName='Helvetica'))
+    styles.add(ParagraphStyle(name='FooterText', fontSize=8, textColor=text_muted, alignment=1, fontName='Helvetica'))
+    styles.add(ParagraphStyle(name='CoName', fontSize=22, textColor=dark_blue, fontName='Helvetica-Bold'))
+    styles.add(ParagraphStyle(name='InvLabel', fontSize=18, textColor=dark_blue, alignment=2, fontName='Helvetica-Bold'))
+    styles.add(ParagraphStyle(name='BillTo', fontSize=10, fontName='Helvetica'))
+    styles.add(ParagraphStyle(name='InvInfo', fontSize=10, fontName='Helvetica', alignment=2))
+    styles.add(ParagraphStyle(name='AmtWords', fontSize=9, fontName='Helvetica'))
+    return styles
+
+
+def load_watermark():
+    """The watermark logo with its pixels and alpha mask already decoded.
+    ImageReader decodes lazily and is not thread-safe while doing so, so
+    shared readers must be decoded before threads use them."""
+    from reportlab.lib.utils import ImageReader
+    watermark = ImageReader(WATERMARK_PATH)
+    watermark.getRGBData()
+    watermark.getTransparent()
+    return watermark
+
+
+def load_resources():
+    """Import reportlab and build the shared styles/watermark once per process.
+    Raises ImportError if reportlab is not installed"""
+    global _resources
+    if _resources is not None:
+        return _resources
+    with _resources_lock:
+        if _resources is not None:
+            return _resources
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib import colors
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+        from reportlab.lib.units import inch
+
+        # Styles and the decoded logo are read-only once built, so every
+        # invoice (and every thread) shares them; flowables are per document.
+        res = {
+            'A4': A4, 'colors': colors, 'inch': inch,
+            'SimpleDocTemplate': SimpleDocTemplate, 'Table': Table, 'TableStyle': TableStyle,
+            'Paragraph': Paragraph, 'Spacer': Spacer,
+            'styles': build_styles(),
+            'dark_blue': colors.HexColor(BRAND_COLORS['dark_blue']),
+            'light_grey': colors.HexColor(BRAND_COLORS['light_grey']),
+            'border_grey': colors.HexColor(BRAND_COLORS['border_grey']),
+            'watermark': load_watermark(),
+        }
+        _resources = res
+        return _resources
+
+
+def compute_gst(total, address):
+    """GST for an order total: CGST + SGST inside Maharashtra, IGST otherwise"""
+    customer_state = (address or '').lower()
+    if COMPANY_STATE.lower() in customer_state:
+        cgst = total * 0.09
+        sgst = total * 0.09
+        igst = 0
+        grand_total = total + cgst + sgst
+        tax_rows = [
+            ['Total Before Tax', f'₹{total:,.2f}'],
+            ['Add CGST (9%)', f'₹{cgst:,.2f}'],
+            ['Add SGST (9%)', f'₹{sgst:,.2f}'],
+            ['Total After Tax', f'₹{grand_total:,.2f}'],
+            ]
+    else:
+        igst = total * 0.18
+        cgst = sgst = 0
+        grand_total = total + igst
+        tax_rows = [
+            ['Total Before Tax', f'₹{total:,.2f}'],
+            ['Add IGST (18%)', f'₹{igst:,.2f}'],
+            ['Total After Tax', f'₹{grand_total:,.2f}'],
+            ]
+    return {'cgst': cgst, 'sgst': sgst, 'igst': igst, 'grand_total': grand_total, 'tax_rows': tax_rows}
+
+
+def amount_in_words(amount):
+    from num2words import num2words
+    return num2words(amount, lang='en_IN').title() + " Rupees Only"
+
+
+def add_watermark(canvas, doc):
+    """Draw the large, very light company logo in the middle of each page"""
+    res = load_resources()
+    canvas.saveState()
+    page_width, page_height = res['A4']
+    try:
+        canvas.setFillAlpha(0.08)   # very light watermark
+    except:
+        pass  # older reportlab versions may not support this
+    # Draw large centered logo
+    logo_width = 300
+    logo_height = 300
+    x = (page_width - logo_width) / 2
+    y = (page_height - logo_height) / 2
+    canvas.drawImage(
+        res['watermark'],
+        x, y,
+        width=logo_width,
+        height=logo_height,
+        mask='auto'
+        )
+    canvas.restoreState()
+
+
+def invoice_story(order, order_id):
+    """Platypus flowables for one order's invoice"""
+    res = load_resources()
+    Table, TableStyle, Paragraph, Spacer, inch = res['Table'], res['TableStyle'], res['Paragraph'], res['Spacer'], res['inch']
+    styles, colors = res['styles'], res['colors']
+    dark_blue, light_grey, border_grey = res['dark_blue'], res['light_grey'], res['border_grey']
+
+    name = order.get('name')
+    address = order.get('address')
+    phone = order.get('phone')
+    email = order.get('email')
+    quantity = int(order.get('quantity') or 0)
+    price = float(order.get('price') or 0)
+    total = price * quantity
+    # ---------------- GST AUTO DETECTION ----------------
+    gst = compute_gst(total, address)
+    # Amount in words
+    amount_words = amount_in_words(gst['grand_total'])
+
+    order_date = order.get('order_date')
+    if hasattr(order_date, 'strftime'):
+        order_date = order_date.strftime('%d %b %Y')
+    else:
+        order_date = str(order_date)
+
+    # Header: Company name + Invoice label
+    header_data = [[
+        Paragraph('<b>OM INDUSTRIES INDIA</b>', styles['CoName']),
+        Paragraph(f'<b>INVOICE</b><br/><font size="9" color="#64748b">#{order_id:06d}</font>', styles['InvLabel'])
+    ]]
+    header_table = Table(header_data, colWidths=[3.8*inch, 2.2*inch])
+    header_table.setStyle(TableStyle([
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('TOPPADDING', (0, 0), (-1, -1), 0),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
+    ]))
+
+    tagline = Paragraph('CNG Cylinder Hydrotesting | Fabrication | Industrial Equipment', styles['CompanyTagline'])
+    spacer_sm = Spacer(1, 0.15*inch)
+    spacer_md = Spacer(1, 0.35*inch)
+
+    # Bill To + Invoice Info side by side
+    bill_to = f'''
+    <b>Bill To</b><br/>
+    {name}<br/>
+    {address}<br/>
+    Phone: {phone}<br/>
+    Email: {email}
+    '''
+    inv_info = f'''
+    <b>Invoice Date</b><br/>
+    {order_date}<br/><br/>
+    <b>Order Reference</b><br/>
+    #{order_id:06d}
+    '''
+    two_col = [[
+        Paragraph(bill_to, styles['BillTo']),
+        Paragraph(inv_info, styles['InvInfo'])
+    ]]
+    info_table = Table(two_col, colWidths=[3.5*inch, 2.5*inch])
+    info_table.setStyle(TableStyle([
+        ('BOX', (0, 0), (-1, -1), 0.5, border_grey),
+        ('BACKGROUND', (0, 0), (-1, -1), light_grey),
+        ('TOPPADDING', (0, 0), (-1, -1), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+        ('LEFTPADDING', (0, 0), (-1, -1), 12),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 12),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ]))
+
+    # Line items table
+    items_data = [
+        ['Description', 'Qty', 'Rate', 'Amount (₹)'],
+        ['Order Items / Services', str(quantity), f'{price:,.2f}', f'{total:,.2f}']
+    ]
+    items_table = Table(items_data, colWidths=[2.5*inch, 0.8*inch, 1*inch, 1.2*inch])
+    items_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), dark_blue),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+        ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('TOPPADDING', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+        ('LEFTPADDING', (0, 0), (-1, -1), 12),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+        ('LINEBELOW', (0, 0), (-1, 0), 1, colors.white),
+        ('BOX', (0, 0), (-1, -1), 0.5, border_grey),
+        ('LINEBELOW', (0, -1), (-1, -1), 1.5, dark_blue),
+    ]))
+
+    # ---------------- TAX BREAKDOWN ----------------
+    tax_table = Table(gst['tax_rows'], colWidths=[4.2*inch, 1.4*inch])
+    tax_table.setStyle(TableStyle([
+        ('ALIGN', (1,0), (-1,-1), 'RIGHT'),
+        ('TOPPADDING', (0,0), (-1,-1), 8),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 8),
+        ('GRID', (0,0), (-1,-1), 0.5, border_grey),
+        ]))
+    amount_words_para = Paragraph(
+        f'<b>Amount in Words:</b> {amount_words}',
+        styles['AmtWords']
+        )
+    bank_table = Table(BANK_DETAILS, colWidths=[2*inch, 3.6*inch])
+    bank_table.setStyle(TableStyle([
+        ('GRID', (0,0), (-1,-1), 0.5, border_grey),
+        ]))
+
+    # Footer
+    footer = Paragraph(
+        'Thank you for your business. | Om Industries India | Payment terms as per agreement.',
+        styles['FooterText']
+    )
+    footer_spacer = Spacer(1, 0.4*inch)
+
+    return [
+        header_table, tagline, spacer_md,
+        info_table, spacer_md,
+        items_table, spacer_sm,
+        tax_table, spacer_sm,
+        amount_words_para, spacer_md,
+        bank_table,
+        footer_spacer, footer
+        ]
+
+
+def build_invoice_pdf(order, order_id, fileobj):
+    """Write the invoice PDF for one order (a dict of the orders row) to fileobj"""
+    res = load_resources()
+    doc = res['SimpleDocTemplate'](fileobj, pagesize=res['A4'], rightMargin=45, leftMargin=45, topMargin=40, bottomMargin=40)
+    doc.build(invoice_story(order, order_id), onFirstPage=add_watermark, onLaterPages=add_watermark)
+
+
+def order_fingerprint(order):
+    """Short hash of the order row - changes whenever the order changes"""
+    payload = json.dumps(order, sort_keys=True, default=str) + INVOICE_LAYOUT_VERSION
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class InvoiceCache:
+    """Cached invoice PDFs on disk plus a background generation queue"""
+
+    def __init__(self, directory, workers=1):
+        self.directory = directory
+        self.workers = workers
+        self._executor = None
+        self._jobs = {}          # path -> Future
+        self._lock = threading.Lock()
+
+    def path_for(self, order_id, order):
+        return os.path.join(self.directory, f'invoice_{order_id}_{order_fingerprint(order)}.pdf')
+
+    def get(self, order_id, order):
+        """Path of the cached PDF for this exact order row, or None"""
+        path = self.path_for(order_id, order)
+        return path if os.path.exists(path) else None
+
+    def render(self, order_id, order):
+        """Generate (or reuse) the PDF for this order and return its path"""
+        path = self.path_for(order_id, order)
+        if os.path.exists(path):
+            return path
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix='.pdf.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                build_invoice_pdf(order, order_id, f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        # Older versions of this order's invoice are now stale
+        self.invalidate(order_id, keep=path)
+        return path
+
+    def invalidate(self, order_id, keep=None):
+        """Delete cached PDFs for an order (call when the order changes)"""
+        for stale in glob.glob(os.path.join(self.directory, f'invoice_{order_id}_*.pdf')):
+            if stale != keep:
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+
+    def submit(self, order_id, order):
+        """Queue background generation; returns immediately"""
+        path = self.path_for(order_id, order)
+        with self._lock:
+            job = self._jobs.get(path)
+            if job is not None and not job.done():
+                return job
+            # Forget finished jobs; their result is the file on disk
+            for done_path in [p for p, j in self._jobs.items() if j.done() and not j.exception()]:
+                del self._jobs[done_path]
+            if self._executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='invoice')
+            job = self._executor.submit(self.render, order_id, dict(order))
+            self._jobs[path] = job
+            return job
+
+    def status(self, order_id, order):
+        """'ready', 'pending', 'failed' (with error text) or 'missing'"""
+        path = self.path_for(order_id, order)
+        if os.path.exists(path):
+            return 'ready', None
+        with self._lock:
+            job = self._jobs.get(path)
+        if job is None:
+            return 'missing', None
+        if not job.done():
+            return 'pending', None
+        error = job.exception()
+        return ('failed', str(error)) if error else ('ready', None)
+
+
+# ---------------- BATCH EXPORT ----------------
+
+def render_invoice_bytes(job):
+    """Process-pool worker: (order_id, order) -> (order_id, PDF bytes).
+    Each worker process loads the reportlab resources once and reuses them"""
+    order_id, order = job
+    buffer = BytesIO()
+    build_invoice_pdf(order, order_id, buffer)
+    return order_id, buffer.getvalue()
+
+
+def batch_processes():
+    return int(os.environ.get('INVOICE_BATCH_PROCESSES', 0)) or os.cpu_count() or 1
+
+
+def iter_invoice_pdfs(orders, cache=None, processes=None):
+    """Yield (order_id, PDF bytes) for [(order_id, order), ...] in input order.
+
+    Cached invoices are read from disk; the rest are rendered by a process
+    pool. At most 2 x processes invoices are in flight, so memory stays
+    bounded however many orders are exported."""
+    processes = processes or batch_processes()
+    pending = deque()
+    executor = None
+    try:
+        for order_id, order in orders:
+            path = cache.get(order_id, order) if cache is not None else None
+            if path is not None:
+                pending.append((order_id, path))
+            elif processes <= 1:
+                pending.append(render_invoice_bytes((order_id, order)))
+            else:
+                if executor is None:
+                    import multiprocessing
+                    from concurrent.futures import ProcessPoolExecutor
+                    # spawn: forking a threaded web worker is unsafe
+                    executor = ProcessPoolExecutor(max_workers=processes,
+                                                   mp_context=multiprocessing.get_context('spawn'))
+                pending.append(executor.submit(render_invoice_bytes, (order_id, dict(order))))
+            while len(pending) > processes * 2:
+                yield _resolve(pending.popleft())
+        while pending:
+            yield _resolve(pending.popleft())
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _resolve(item):
+    if hasattr(item, 'result'):
+        return item.result()
+    order_id, data = item
+    if isinstance(data, str):
+        with open(data, 'rb') as f:
+            return order_id, f.read()
+    return order_id, data
+
+
+class StreamSink:
+    """Write-only file object for zipfile; drain() hands out what was written so far"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_invoice_zip(orders, cache=None, processes=None):
+    """Generator of ZIP archive chunks with one invoice_order_<id>.pdf per order"""
+    import zipfile
+    sink = StreamSink()
+    # PDFs are already compressed - store them as-is
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        for order_id, data in iter_invoice_pdfs(orders, cache=cache, processes=processes):
+            archive.writestr(f'invoice_order_{order_id}.pdf', data)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    yield sink.drain()
+
+
+def write_merged_invoice_pdf(orders, fileobj):
+    """One PDF with every order's invoice, each starting on a new page"""
+    res = load_resources()
+    from reportlab.platypus import PageBreak
+    story = []
+    for order_id, order in orders:
+        if story:
+            story.append(PageBreak())
+        story.extend(invoice_story(order, order_id))
+    doc = res['SimpleDocTemplate'](fileobj, pagesize=res['A4'], rightMargin=45, leftMargin=45, topMargin=40, bottomMargin=40)
+    doc.build(story, onFirstPage=add_watermark, onLaterPages=add_watermark)
+
+
+def stream_merged_invoice_pdf(orders, chunk_size=64 * 1024):
+    """Generator of merged-PDF chunks, spooled through a temp file rather than memory"""
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+        write_merged_invoice_pdf(orders, spool)
+        spool.seek(0)
+        while True:
+            chunk = spool.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
@@ -0,0 +1,63 @@
+"""
+Structured logging: one line per event, with the event's fields as keys.
+
+    log = logging.getLogger(__name__)
+    log_event(log, 'db.connected', backend='postgres', host=hostname)
+
+    {"ts": "2026-10-18T09:12:03.512Z", "level": "info", "logger": "app", "event": "db.connected", "backend": "postgres", ...}
+
+Lines are JSON when stderr is not a terminal (containers, gunicorn under a
+process manager) and key=value text on a terminal.
+
+Settings (environment variables, optional):
+    LOG_FORMAT   json or text (default: text on a terminal, json otherwise)
+    LOG_LEVEL    default INFO
+"""
+import json
+import logging
+import os
+import sys
+import time
+
+
+def log_event(logger, event, level=logging.INFO, **fields):
+    logger.log(level, event, extra={'fields': fields})
+
+
+def _timestamp(record):
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + f'.{int(record.msecs):03d}Z'
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        line = {'ts': _timestamp(record), 'level': record.levelname.lower(), 'logger': record.name,
+                'event': record.getMessage()}
+        line.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            line['exc'] = self.formatException(record.exc_info)
+        return json.dumps(line, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        parts = [_timestamp(record), record.levelname, record.name, record.getMessage()]
+        for key, value in getattr(record, 'fields', {}).items():
+            value = str(value)
+            parts.append(f'{key}={json.dumps(value, ensure_ascii=False) if not value or " " in value else value}')
+        line = ' '.join(parts)
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+
+def configure_logging():
+    """Send log records to stderr in the configured format, unless the root
+    logger was already set up (e.g. by a test runner)"""
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    fmt = os.environ.get('LOG_FORMAT') or ('text' if sys.stderr.isatty() else 'json')
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+    root.addHandler(handler)
+    root.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
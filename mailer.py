@@ -0,0 +1,383 @@
+"""
+Outbound email: a persistent outbox table drained by a background sender.
+
+Routes never talk to SMTP. They add a row to `email_outbox` in the same
+transaction as their own insert and return; a sender thread (or a separate
+`flask send-outbox` process) delivers queued mail, retrying failures with
+exponential backoff.
+
+Delivery reuses one long-lived SMTP session per process (SMTPSession)
+instead of connect/STARTTLS/login/quit per email, and can optionally batch
+submissions into a digest: one email per N submissions or T seconds.
+
+Several gunicorn workers may run a sender at the same time - each row is
+claimed with a conditional UPDATE before it is sent, so it goes out once.
+
+Settings (environment variables, optional):
+    SMTP_SERVER, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, RECIPIENT_EMAIL
+    OUTBOX_SENDER          'thread' (default) sends from the web process,
+                           'off' leaves it to `flask send-outbox`
+    OUTBOX_POLL_SECONDS    how often the sender looks for due mail (default 5)
+    OUTBOX_MAX_ATTEMPTS    give up (status 'failed') after N tries (default 8)
+    OUTBOX_RETRY_BASE      first retry delay in seconds, doubled each time (default 30)
+    OUTBOX_DIGEST_SIZE     send a digest once N emails are waiting (0 = digest off, default)
+    OUTBOX_DIGEST_SECONDS  ...or once the oldest has waited T seconds (default 300)
+    SMTP_IDLE_SECONDS      close the SMTP session after N idle seconds (default 120)
+"""
+import logging
+import os
+import random
+import smtplib
+import threading
+import time
+from collections import deque
+
+from logs import log_event
+
+log = logging.getLogger(__name__)
+
+# A claimed row that is not finished within this time is picked up again
+CLAIM_LEASE_SECONDS = 300
+MAX_RETRY_DELAY = 3600
+
+
+def smtp_settings():
+    """SMTP configuration from the environment"""
+    return {
+        'server': os.environ.get('SMTP_SERVER', 'smtp.gmail.com'),
+        'port': int(os.environ.get('SMTP_PORT', 587)),
+        'user': os.environ.get('SMTP_USER', ''),
+        'password': os.environ.get('SMTP_PASSWORD', ''),
+        'recipient': os.environ.get('RECIPIENT_EMAIL', ''),
+    }
+
+
+def smtp_configured(settings):
+    return bool(settings['user'] and settings['password'] and settings['recipient'])
+
+
+def build_message(settings, recipient, subject, body):
+    # Imported here: the MIME package is only needed once something is sent
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+    msg = MIMEMultipart()
+    msg['From'] = settings['user']
+    msg['To'] = recipient
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+
+def smtp_send(settings, recipient, subject, body):
+    """Deliver one email over a fresh SMTP session; raises on failure"""
+    server = smtplib.SMTP(settings['server'], settings['port'], timeout=30)
+    try:
+        server.starttls()
+        server.login(settings['user'], settings['password'])
+        server.send_message(build_message(settings, recipient, subject, body))
+    finally:
+        try:
+            server.quit()
+        except Exception:
+            pass
+
+
+class SMTPSession:
+    """Long-lived SMTP connection shared by the senders in one process.
+
+    Connects (STARTTLS + login) on first use and keeps the session open.
+    A session idle for a while is checked with NOOP before reuse, and a
+    send that fails because the server dropped the connection is retried
+    once on a fresh one. Also keeps throughput counters."""
+
+    @staticmethod
+    def _is_stale(error):
+        """True if the connection is gone, False if this message was refused.
+        SMTPException subclasses OSError, so refusals are excluded explicitly"""
+        if isinstance(error, smtplib.SMTPServerDisconnected):
+            return True
+        return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+    def __init__(self, idle_timeout=120.0, check_after=10.0):
+        self.idle_timeout = idle_timeout
+        self.check_after = check_after
+        self._server = None
+        self._key = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+        self._recent = deque()          # send timestamps in the last minute
+        self.counters = {'sent': 0, 'errors': 0, 'connects': 0, 'reconnects': 0, 'send_seconds': 0.0}
+        self.started_at = time.time()
+
+    def _open(self, settings):
+        server = smtplib.SMTP(settings['server'], settings['port'], timeout=30)
+        server.starttls()
+        server.login(settings['user'], settings['password'])
+        self._server = server
+        self._key = (settings['server'], settings['port'], settings['user'], settings['password'])
+        self.counters['connects'] += 1
+
+    def _close(self):
+        server, self._server = self._server, None
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:
+                pass
+
+    def _ensure(self, settings):
+        key = (settings['server'], settings['port'], settings['user'], settings['password'])
+        if self._server is not None and self._key != key:
+            self._close()           # settings changed
+        if self._server is not None and time.time() - self._last_used > self.check_after:
+            try:
+                if self._server.noop()[0] != 250:
+                    raise smtplib.SMTPServerDisconnected('NOOP failed')
+            except Exception:
+                self._close()
+                self.counters['reconnects'] += 1
+        if self._server is None:
+            self._open(settings)
+
+    def send(self, settings, recipient, subject, body):
+        """Send one email on the shared session; raises on failure"""
+        msg = build_message(settings, recipient, subject, body)
+        with self._lock:
+            start = time.time()
+            try:
+                self._ensure(settings)
+                try:
+                    self._server.send_message(msg)
+                except Exception as e:
+                    if not self._is_stale(e):
+                        raise
+                    # Server closed an idle connection under us - one retry on a new one
+                    self._close()
+                    self.counters['reconnects'] += 1
+                    self._open(settings)
+                    self._server.send_message(msg)
+            except Exception as e:
+                self.counters['errors'] += 1
+                if self._is_stale(e):
+                    self._close()
+                raise
+            finally:
+                self._last_used = time.time()
+                self.counters['send_seconds'] += self._last_used - start
+            self.counters['sent'] += 1
+            self._recent.append(self._last_used)
+
+    def close_if_idle(self):
+        """Drop the session after idle_timeout without sends (called by the sender loop)"""
+        with self._lock:
+            if self._server is not None and time.time() - self._last_used > self.idle_timeout:
+                self._close()
+
+    def stats(self):
+        with self._lock:
+            cutoff = time.time() - 60
+            while self._recent and self._recent[0] < cutoff:
+                self._recent.popleft()
+            data = dict(self.counters)
+            data['connected'] = self._server is not None
+            data['sent_last_minute'] = len(self._recent)
+        elapsed = max(time.time() - self.started_at, 1e-9)
+        data['avg_send_ms'] = round(data['send_seconds'] * 1000 / data['sent'], 1) if data['sent'] else 0.0
+        data['sent_per_minute_overall'] = round(data['sent'] * 60 / elapsed, 2)
+        data['emails_per_connection'] = round(data['sent'] / data['connects'], 2) if data['connects'] else 0.0
+        data['send_seconds'] = round(data['send_seconds'], 3)
+        return data
+
+
+def retry_delay(attempts, base):
+    """Exponential backoff with a little jitter, capped at an hour"""
+    delay = min(base * (2 ** max(attempts - 1, 0)), MAX_RETRY_DELAY)
+    return delay * random.uniform(0.9, 1.1)
+
+
+class Outbox:
+    """Queue emails in the database and deliver them in the background"""
+
+    def __init__(self, connect, execute, send=smtp_send, settings=smtp_settings,
+                 poll_interval=5.0, max_attempts=8, retry_base=30.0, batch_size=20,
+                 digest_size=0, digest_seconds=300.0, on_idle=None):
+        self._connect = connect        # () -> DB connection (close() returns it)
+        self._execute = execute        # execute_query(conn, query, params)
+        self._send = send              # (settings, recipient, subject, body) -> None, raises on failure
+        self._settings = settings
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.batch_size = batch_size
+        # Digest mode: combine waiting emails into one once digest_size are
+        # waiting or the oldest has waited digest_seconds (digest_size=0: off)
+        self.digest_size = digest_size
+        self.digest_seconds = digest_seconds
+        self._on_idle = on_idle        # called when a poll finds nothing to send
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self.counters = {'queued': 0, 'sent': 0, 'retried': 0, 'failed': 0, 'digests': 0}
+
+    # ---- producer side ----
+    def enqueue(self, conn, recipient, subject, body):
+        """Add an email to the outbox on the caller's connection - the caller commits"""
+        self._execute(conn, """
+            INSERT INTO email_outbox (recipient, subject, body, status, attempts, next_attempt_at)
+            VALUES (?, ?, ?, 'pending', 0, ?)
+        """, (recipient, subject, body, time.time()))
+        self.counters['queued'] += 1
+
+    def notify(self):
+        """Wake the sender now instead of at the next poll (call after commit)"""
+        self._wake.set()
+
+    # ---- sender side ----
+    def start(self):
+        """Start the background sender thread once per process"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name='outbox-sender', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                sent = self.drain_once()
+            except Exception as e:
+                log_event(log, 'outbox.error', logging.ERROR, error=str(e))
+                sent = 0
+            if sent < self.batch_size:
+                if not sent and self._on_idle is not None:
+                    self._on_idle()
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def drain_once(self):
+        """Send every due email (up to batch_size); returns how many were processed"""
+        settings = self._settings()
+        if not smtp_configured(settings):
+            return 0
+        now = time.time()
+        # In digest mode look further ahead so a full digest can be collected
+        limit = max(self.batch_size, self.digest_size)
+        conn = self._connect()
+        try:
+            cursor = self._execute(conn, """
+                SELECT id, next_attempt_at FROM email_outbox
+                WHERE status IN ('pending', 'sending') AND next_attempt_at <= ?
+                ORDER BY id LIMIT ?
+            """, (now, limit))
+            due = [(r['id'], r['next_attempt_at']) if hasattr(r, 'keys') else (r[0], r[1]) for r in cursor.fetchall()]
+        finally:
+            conn.close()
+        if not due:
+            return 0
+        if self.digest_size > 0:
+            oldest = min(at for _, at in due)
+            if len(due) < self.digest_size and now - oldest < self.digest_seconds:
+                return 0     # keep collecting
+            rows = [row for row in (self._claim(outbox_id, now) for outbox_id, _ in due) if row is not None]
+            if rows:
+                self._deliver_digest(settings, rows)
+            return len(rows)
+        processed = 0
+        for outbox_id, _ in due:
+            row = self._claim(outbox_id, now)
+            if row is not None:
+                self._deliver(settings, row)
+                processed += 1
+        return processed
+
+    def _claim(self, outbox_id, now):
+        """Mark a row as being sent by this process; None if another sender got it"""
+        conn = self._connect()
+        try:
+            cursor = self._execute(conn, """
+                UPDATE email_outbox SET status = 'sending', next_attempt_at = ?
+                WHERE id = ? AND status IN ('pending', 'sending') AND next_attempt_at <= ?
+            """, (now + CLAIM_LEASE_SECONDS, outbox_id, now))
+            if cursor.rowcount != 1:
+                conn.rollback()
+                return None
+            cursor = self._execute(conn, "SELECT * FROM email_outbox WHERE id = ?", (outbox_id,))
+            row = dict(cursor.fetchone())
+            conn.commit()
+            return row
+        finally:
+            conn.close()
+
+    def _deliver(self, settings, row):
+        recipient = row['recipient'] or settings['recipient']
+        try:
+            self._send(settings, recipient, row['subject'], row['body'])
+        except Exception as e:
+            self._record_failure(row, e)
+            return
+        conn = self._connect()
+        try:
+            self._execute(conn, "UPDATE email_outbox SET status = 'sent', attempts = attempts + 1, sent_at = ?, last_error = NULL WHERE id = ?",
+                          (time.time(), row['id']))
+            conn.commit()
+        finally:
+            conn.close()
+        self.counters['sent'] += 1
+        log_event(log, 'email.sent', recipient=recipient)
+
+    def _deliver_digest(self, settings, rows):
+        """One email containing every claimed row"""
+        if len(rows) == 1:
+            self._deliver(settings, rows[0])
+            return
+        recipient = rows[0]['recipient'] or settings['recipient']
+        subject = f'{len(rows)} new contact form submissions'
+        parts = [f"{len(rows)} messages were submitted on the Om Industries India website.\n"]
+        for i, row in enumerate(rows, 1):
+            parts.append(f"===== {i}/{len(rows)}: {row['subject']} =====\n{row['body'].strip()}\n")
+        try:
+            self._send(settings, recipient, subject, '\n'.join(parts))
+        except Exception as e:
+            for row in rows:
+                self._record_failure(row, e)
+            return
+        conn = self._connect()
+        try:
+            now = time.time()
+            for row in rows:
+                self._execute(conn, "UPDATE email_outbox SET status = 'sent', attempts = attempts + 1, sent_at = ?, last_error = NULL WHERE id = ?",
+                              (now, row['id']))
+            conn.commit()
+        finally:
+            conn.close()
+        self.counters['sent'] += len(rows)
+        self.counters['digests'] += 1
+        log_event(log, 'email.digest_sent', recipient=recipient, emails=len(rows))
+
+    def _record_failure(self, row, error):
+        attempts = (row.get('attempts') or 0) + 1
+        if isinstance(error, smtplib.SMTPAuthenticationError):
+            log_event(log, 'email.auth_failed', logging.ERROR, error=str(error), hint="check SMTP_USER and SMTP_PASSWORD")
+        else:
+            log_event(log, 'email.failed', logging.ERROR, email_id=row['id'], attempt=attempts, error=str(error))
+        if attempts >= self.max_attempts:
+            status, next_at = 'failed', time.time()
+            self.counters['failed'] += 1
+        else:
+            status, next_at = 'pending', time.time() + retry_delay(attempts, self.retry_base)
+            self.counters['retried'] += 1
+        conn = self._connect()
+        try:
+            self._execute(conn, "UPDATE email_outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                          (status, attempts, next_at, str(error)[:500], row['id']))
+            conn.commit()
+        finally:
+            conn.close()
@@ -0,0 +1,89 @@
+"""
+Admin dashboard counters, computed in a single aggregate query and cached.
+
+All counters (feedback, pending feedback, contacts, orders by status and
+revenue) come back in one row from one round trip: each table is aggregated
+once in a sub-select and the sub-selects are cross joined.
+
+The result is cached for `ttl` seconds. Writes made through this process
+call invalidate() so the admin sees their own change straight away; other
+workers pick it up when their copy expires.
+"""
+import threading
+import time
+
+ORDER_STATUSES = ('process', 'shipped', 'complete', 'cancel')
+
+
+def _value(row, key, index):
+    return row[key] if hasattr(row, 'keys') else row[index]
+
+
+class DashboardMetrics:
+    """Cached dashboard counters for both SQLite and PostgreSQL"""
+
+    def __init__(self, connect, execute, ttl=30.0, statuses=ORDER_STATUSES):
+        self._connect = connect          # () -> pooled connection
+        self._execute = execute          # execute_query(conn, query, params)
+        self.ttl = ttl
+        self.statuses = statuses
+        self._lock = threading.Lock()
+        self._cached = None
+        self._expires = 0.0
+        self._has_price = None           # legacy orders tables have no price column
+        self.refreshes = 0
+
+    def _columns(self):
+        cols = ['feedback_count', 'pending_feedback_count', 'contact_count', 'order_count']
+        cols += [f'orders_{s}' for s in self.statuses]
+        if self._has_price:
+            cols.append('revenue')
+        return cols
+
+    def _query(self):
+        by_status = ''.join(
+            f", SUM(CASE WHEN COALESCE(status, 'process') = '{s}' THEN 1 ELSE 0 END) AS orders_{s}"
+            for s in self.statuses)
+        revenue = (", SUM(CASE WHEN COALESCE(status, 'process') <> 'cancel' "
+                   "THEN quantity * price ELSE 0 END) AS revenue") if self._has_price else ''
+        # Column order matches _columns(): f.*, c.*, o.*
+        return f"""
+            SELECT f.*, c.*, o.*
+            FROM (SELECT COUNT(*) AS feedback_count,
+                         SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) AS pending_feedback_count
+                  FROM feedback) f,
+                 (SELECT COUNT(*) AS contact_count FROM contacts) c,
+                 (SELECT COUNT(*) AS order_count{by_status}{revenue} FROM orders) o
+        """
+
+    def _load(self):
+        conn = self._connect()
+        try:
+            if self._has_price is None:
+                cursor = self._execute(conn, "SELECT * FROM orders WHERE 1 = 0")
+                self._has_price = 'price' in [d[0] for d in cursor.description]
+            row = self._execute(conn, self._query()).fetchone()
+        finally:
+            conn.close()
+        data = {col: (_value(row, col, i) or 0) for i, col in enumerate(self._columns())}
+        data['orders_by_status'] = {s: int(data.pop(f'orders_{s}')) for s in self.statuses}
+        data['revenue'] = float(data['revenue']) if 'revenue' in data else None
+        for key in ('feedback_count', 'pending_feedback_count', 'contact_count', 'order_count'):
+            data[key] = int(data[key])
+        return data
+
+    def get(self):
+        """Current counters as a dict (from cache while fresh)"""
+        with self._lock:
+            if self._cached is not None and time.monotonic() < self._expires:
+                return self._cached
+            data = self._load()
+            self._cached = data
+            self._expires = time.monotonic() + self.ttl
+            self.refreshes += 1
+            return data
+
+    def invalidate(self):
+        """Drop the cached counters (call after writing feedback, contacts or orders)"""
+        with self._lock:
+            self._cached = None
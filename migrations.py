@@ -0,0 +1,407 @@
+"""
+Versioned schema migrations for SQLite and PostgreSQL.
+
+Each migration is a function registered with @migration(version, name).
+Applied versions are recorded in the `schema_version` table, so at startup
+the app only runs one query (current_version) and migrates when the
+database is behind; `flask migrate` applies pending migrations explicitly.
+
+Only one process migrates at a time: PostgreSQL takes a transaction-level
+advisory lock, SQLite a write lock (BEGIN IMMEDIATE). A process that waited
+for the lock re-reads the version and finds nothing left to do. All pending
+migrations run in one transaction (DDL is transactional on both backends),
+so a failed migration leaves the schema as it was.
+
+Migration 1 is written to also bring databases created before this module
+existed (by init_db() or the old create_*/migrate_db.py scripts) up to date.
+"""
+from search_index import SearchIndex
+
+# Arbitrary constant shared by every process that migrates this database
+ADVISORY_LOCK_ID = 4_831_120_117
+
+_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+MIGRATIONS = []
+
+
+class Migration:
+    def __init__(self, version, name, apply):
+        self.version = version
+        self.name = name
+        self.apply = apply
+
+
+class MigrationContext:
+    """What a migration function gets: the connection, a cursor and the dialect"""
+
+    def __init__(self, conn, execute, postgres):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.execute = execute           # execute_query(conn, query, params) - '?' placeholders
+        self.postgres = postgres
+
+    def columns(self, table):
+        """Column names of an existing table"""
+        if self.postgres:
+            self.cursor.execute("SELECT column_name FROM information_schema.columns WHERE table_name = %s", (table,))
+            return [_scalar(row) for row in self.cursor.fetchall()]
+        self.cursor.execute(f"PRAGMA table_info({table})")
+        return [row[1] for row in self.cursor.fetchall()]
+
+
+class Index:
+    """A secondary index both backends should have (see INDEXES)"""
+
+    def __init__(self, name, table, columns, where=None, include=()):
+        self.name = name
+        self.table = table
+        self.columns = columns           # key columns, e.g. 'order_id, changed_at'
+        self.where = where               # partial index predicate
+        self.include = include           # extra columns so the index covers the query
+
+    def ddl(self, postgres):
+        columns = self.columns
+        include = ''
+        if self.include:
+            if postgres:
+                include = f" INCLUDE ({', '.join(self.include)})"
+            else:
+                columns += ', ' + ', '.join(self.include)   # SQLite: trailing key columns
+        where = f" WHERE {self.where}" if self.where else ''
+        return f"CREATE INDEX IF NOT EXISTS {self.name} ON {self.table} ({columns}){include}{where}"
+
+
+# The declared index set: every hot lookup path has one. Created by the
+# migrations below, checked by missing_indexes() and check_indexes.py.
+INDEXES = [
+    # Admin lists, keyset-paginated (pagination.py)
+    Index('idx_orders_date_id', 'orders', 'order_date, id'),
+    Index('idx_contacts_date_id', 'contacts', 'date, id'),
+    Index('idx_feedback_date_id', 'feedback', 'date, id'),
+    Index('idx_services_division_order', 'services', 'division_id, sort_order, name, id'),
+    # Home page and /feedback: approved feedback, newest first
+    Index('idx_feedback_approved_date', 'feedback', 'date', where="status = 'approved'"),
+    # admin_order_detail: one order's status history; covers its SELECT *
+    Index('idx_order_status_log_order', 'order_status_log', 'order_id, changed_at', include=('status', 'id')),
+    # Outbox sender: only the few rows still due, not the ever-growing sent history
+    Index('idx_email_outbox_due', 'email_outbox', 'next_attempt_at', where="status IN ('pending', 'sending')"),
+]
+
+
+def migration(version, name):
+    """Register a migration; versions must be added in increasing order"""
+    def register(fn):
+        if MIGRATIONS and version <= MIGRATIONS[-1].version:
+            raise ValueError(f"migration {version} registered after {MIGRATIONS[-1].version}")
+        MIGRATIONS.append(Migration(version, name, fn))
+        return fn
+    return register
+
+
+def _scalar(row):
+    if row is None:
+        return None
+    return next(iter(row.values())) if isinstance(row, dict) else row[0]
+
+
+# ---- migrations ----
+
+@migration(1, 'base tables: feedback, contacts, orders, order_status_log, services')
+def _base_tables(ctx):
+    c = ctx.cursor
+    if ctx.postgres:
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS feedback (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            rating INTEGER NOT NULL,
+            message TEXT NOT NULL,
+            status VARCHAR(50) DEFAULT 'pending',
+            date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS contacts (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            email VARCHAR(255),
+            phone VARCHAR(50),
+            message TEXT,
+            date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS orders (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            address TEXT NOT NULL,
+            phone VARCHAR(50) NOT NULL,
+            email VARCHAR(255) NOT NULL,
+            quantity INTEGER NOT NULL DEFAULT 1,
+            order_date DATE NOT NULL,
+            status VARCHAR(50) DEFAULT 'process',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS order_status_log (
+            id SERIAL PRIMARY KEY,
+            order_id INTEGER NOT NULL REFERENCES orders(id),
+            status VARCHAR(50) NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS services (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            slug VARCHAR(255) NOT NULL UNIQUE,
+            division VARCHAR(255) NOT NULL,
+            division_id VARCHAR(100) NOT NULL,
+            short_desc TEXT,
+            description TEXT,
+            image VARCHAR(500) DEFAULT 'image/manufacture.jpg',
+            gallery_images TEXT,
+            sort_order INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+    else:
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS feedback (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            rating INTEGER NOT NULL,
+            message TEXT NOT NULL,
+            status TEXT DEFAULT 'pending',
+            date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS contacts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT,
+            phone TEXT,
+            message TEXT,
+            date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            address TEXT NOT NULL,
+            phone TEXT NOT NULL,
+            email TEXT NOT NULL,
+            quantity INTEGER NOT NULL DEFAULT 1,
+            order_date TEXT NOT NULL,
+            status TEXT DEFAULT 'process',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS order_status_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER NOT NULL REFERENCES orders(id),
+            status TEXT NOT NULL,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        c.execute("""
+        CREATE TABLE IF NOT EXISTS services (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            slug TEXT NOT NULL UNIQUE,
+            division TEXT NOT NULL,
+            division_id TEXT NOT NULL,
+            short_desc TEXT,
+            description TEXT,
+            image TEXT DEFAULT 'image/manufacture.jpg',
+            gallery_images TEXT,
+            sort_order INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+
+    # Columns missing from tables made by older versions of the app
+    # (previously patched up by migrate_db.py and on every boot by init_db)
+    text = 'VARCHAR(50)' if ctx.postgres else 'TEXT'
+    feedback_cols = ctx.columns('feedback')
+    if 'rating' not in feedback_cols:
+        c.execute("ALTER TABLE feedback ADD COLUMN rating INTEGER DEFAULT 5")
+    if 'status' not in feedback_cols:
+        c.execute(f"ALTER TABLE feedback ADD COLUMN status {text} DEFAULT 'pending'")
+        c.execute("UPDATE feedback SET status = 'approved' WHERE status IS NULL")
+    if 'date' not in ctx.columns('contacts'):
+        # SQLite cannot add a column with a non-constant default
+        default = ' DEFAULT CURRENT_TIMESTAMP' if ctx.postgres else ''
+        c.execute(f"ALTER TABLE contacts ADD COLUMN date TIMESTAMP{default}")
+        # so backfill the existing rows; app.contact() sets it on new ones
+        c.execute("UPDATE contacts SET date = CURRENT_TIMESTAMP WHERE date IS NULL")
+    if 'gallery_images' not in ctx.columns('services'):
+        c.execute("ALTER TABLE services ADD COLUMN gallery_images TEXT")
+
+
+@migration(2, 'email_outbox table')
+def _email_outbox(ctx):
+    # Queued notification emails, see mailer.py
+    if ctx.postgres:
+        ctx.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id SERIAL PRIMARY KEY,
+            recipient VARCHAR(255),
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at DOUBLE PRECISION NOT NULL,
+            last_error TEXT,
+            sent_at DOUBLE PRECISION,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+    else:
+        ctx.cursor.execute("""
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            recipient TEXT,
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT,
+            sent_at REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+
+
+@migration(3, 'full-text search index on services')
+def _search_index(ctx):
+    SearchIndex(ctx.execute, ctx.postgres).ensure(ctx.conn)
+
+
+@migration(4, 'composite indexes for the paginated admin lists')
+def _admin_list_indexes(ctx):
+    # Keyset pagination seeks on these (see pagination.py)
+    for ddl in (
+        "CREATE INDEX IF NOT EXISTS idx_orders_date_id ON orders (order_date, id)",
+        "CREATE INDEX IF NOT EXISTS idx_contacts_date_id ON contacts (date, id)",
+        "CREATE INDEX IF NOT EXISTS idx_feedback_date_id ON feedback (date, id)",
+        "CREATE INDEX IF NOT EXISTS idx_services_division_order ON services (division_id, sort_order, name, id)",
+    ):
+        ctx.cursor.execute(ddl)
+
+
+@migration(5, 'orders.price column')
+def _orders_price(ctx):
+    # The order pages and invoices read orders.price, but only databases
+    # created by early versions of the app had the column
+    if 'price' not in ctx.columns('orders'):
+        ctx.cursor.execute(f"ALTER TABLE orders ADD COLUMN price {'NUMERIC(12, 2)' if ctx.postgres else 'REAL'} DEFAULT 0")
+
+
+@migration(6, 'seed services from products_data')
+def _seed_services(ctx):
+    from products_data import PRODUCTS
+    ctx.cursor.execute("SELECT COUNT(*) AS cnt FROM services")
+    if _scalar(ctx.cursor.fetchone()):
+        return
+    for p in PRODUCTS.values():
+        ctx.execute(ctx.conn, """
+            INSERT INTO services (name, slug, division, division_id, short_desc, description, image, gallery_images)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            p.get('name'), p.get('slug'), p.get('division'), p.get('division_id'),
+            p.get('short_desc'), p.get('description'), p.get('image'), p.get('gallery_images')
+        ))
+
+
+@migration(7, 'indexes on hot lookup columns (feedback, order_status_log, email_outbox)')
+def _lookup_indexes(ctx):
+    for index in INDEXES:
+        ctx.cursor.execute(index.ddl(ctx.postgres))
+
+
+@migration(8, 'backfill NULL contacts.date')
+def _contacts_date_backfill(ctx):
+    # Legacy SQLite databases got contacts.date without a default (see
+    # migration 1), leaving NULLs that the (date, id) keyset pagination and
+    # the exports skip or misorder
+    ctx.cursor.execute("UPDATE contacts SET date = CURRENT_TIMESTAMP WHERE date IS NULL")
+
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+# ---- runner ----
+
+def current_version(conn):
+    """Highest applied migration (0 for a database that predates schema_version)"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT MAX(version) FROM schema_version")
+        return _scalar(cursor.fetchone()) or 0
+    except Exception:
+        conn.rollback()          # PostgreSQL: clear the aborted transaction
+        return 0
+
+
+def missing_indexes(conn, postgres):
+    """Names of declared INDEXES that do not exist in the database"""
+    cursor = conn.cursor()
+    if postgres:
+        cursor.execute("SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()")
+    else:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    existing = {_scalar(row) for row in cursor.fetchall()}
+    return [index.name for index in INDEXES if index.name not in existing]
+
+
+def migration_status(conn):
+    """[(version, name, applied)] for every known migration"""
+    version = current_version(conn)
+    return [(m.version, m.name, m.version <= version) for m in MIGRATIONS]
+
+
+def run_migrations(conn, execute, postgres, lock_timeout=60.0):
+    """Apply pending migrations under a cross-process lock; returns those applied"""
+    conn.rollback()
+    cursor = conn.cursor()
+    busy_timeout = None
+    if postgres:
+        # Held until commit/rollback; other workers queue here
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (ADVISORY_LOCK_ID,))
+    else:
+        busy_timeout = _scalar(cursor.execute("PRAGMA busy_timeout").fetchone())
+        cursor.execute(f"PRAGMA busy_timeout = {int(lock_timeout * 1000)}")
+        cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute(_VERSION_TABLE)
+        cursor.execute("SELECT MAX(version) FROM schema_version")
+        version = _scalar(cursor.fetchone()) or 0
+        ctx = MigrationContext(conn, execute, postgres)
+        applied = []
+        for m in MIGRATIONS:
+            if m.version <= version:
+                continue
+            m.apply(ctx)
+            execute(conn, "INSERT INTO schema_version (version, name) VALUES (?, ?)", (m.version, m.name))
+            applied.append(m)
+        conn.commit()
+        return applied
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        if busy_timeout is not None:
+            cursor.execute(f"PRAGMA busy_timeout = {int(busy_timeout)}")
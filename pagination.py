@@ -0,0 +1,117 @@
+"""
+Keyset (cursor) pagination for the admin list pages.
+
+Instead of OFFSET, each page is fetched with a row-value comparison against
+the sort key of the last row shown, e.g. for orders
+
+    WHERE (order_date, id) < (?, ?) ORDER BY order_date DESC, id DESC LIMIT ?
+
+which walks the composite index (order_date, id) from the cursor onwards, so
+page 500 costs the same as page 1. Row values work in SQLite >= 3.15 and in
+PostgreSQL. The sort key must end with the primary key (so it is unique) and
+its columns are expected to be non-NULL.
+
+The cursor is the key of the boundary row, JSON-encoded and base64url'd so
+it can travel in the query string (?after=... / ?before=...).
+"""
+import base64
+import binascii
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(values):
+    """Opaque query-string token for a sort key (dates become ISO strings)"""
+    raw = json.dumps(list(values), default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, width):
+    """Sort key from a token, or None if it is missing or malformed"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw.decode('utf-8'))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        return None
+    if not isinstance(values, list) or len(values) != width:
+        return None
+    return values
+
+
+def page_size_from(value, default=DEFAULT_PAGE_SIZE):
+    """Clamp a requested page size (?per_page=) to 1..MAX_PAGE_SIZE"""
+    try:
+        size = int(value) if value else default
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+class KeysetPage:
+    """One page of rows plus the cursors for the neighbouring pages"""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, per_page=None):
+        self.items = items
+        self.next_cursor = next_cursor   # pass as ?after= for the next page
+        self.prev_cursor = prev_cursor   # pass as ?before= for the previous page
+        self.per_page = per_page         # only set when the request asked for a size
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def _key(row, keys):
+    return [row[k] for k in keys]
+
+
+def fetch_page(execute, conn, table, keys, page_size, after=None, before=None,
+               descending=False, columns='*'):
+    """Fetch one page of `table` ordered by `keys` (all ascending or all descending).
+
+    `after` / `before` are cursor tokens from a previous KeysetPage. Returns
+    a KeysetPage whose items are the raw DB rows in display order.
+    """
+    cols = ', '.join(keys)
+    placeholders = ', '.join('?' for _ in keys)
+    after_key = decode_cursor(after, len(keys))
+    before_key = decode_cursor(before, len(keys)) if after_key is None else None
+    # Walking backwards (before=) reads the index the other way, then flips the rows
+    backwards = before_key is not None
+    cursor_key = before_key if backwards else after_key
+    reverse = descending != backwards
+    direction = 'DESC' if reverse else 'ASC'
+
+    query = f"SELECT {columns} FROM {table}"
+    params = []
+    if cursor_key is not None:
+        query += f" WHERE ({cols}) {'<' if reverse else '>'} ({placeholders})"
+        params.extend(cursor_key)
+    query += " ORDER BY " + ', '.join(f"{k} {direction}" for k in keys) + " LIMIT ?"
+    params.append(page_size + 1)
+
+    rows = execute(conn, query, tuple(params)).fetchall() or []
+    more = len(rows) > page_size
+    rows = list(rows[:page_size])
+    if backwards:
+        rows.reverse()
+
+    if backwards:
+        has_prev, has_next = more, True
+    else:
+        has_prev, has_next = cursor_key is not None, more
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_next:
+            next_cursor = encode_cursor(_key(rows[-1], keys))
+        if has_prev:
+            prev_cursor = encode_cursor(_key(rows[0], keys))
+    return KeysetPage(rows, next_cursor, prev_cursor)
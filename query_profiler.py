@@ -0,0 +1,180 @@
+"""
+Opt-in query profiler around execute_query (QUERY_PROFILER=1).
+
+- Statements are grouped by fingerprint: the SQL with literals and
+  placeholders replaced by ?, IN lists collapsed and whitespace normalized,
+  so "WHERE id = 7" and "WHERE id = 8" count as one statement.
+- Count, total, mean and max time are accumulated per fingerprint.
+- A statement slower than SLOW_QUERY_MS is logged with its EXPLAIN plan
+  (EXPLAIN QUERY PLAN on SQLite; plain EXPLAIN on PostgreSQL, which does
+  not run the statement). Each fingerprint is explained at most once a
+  minute.
+- A request that runs the same fingerprint REPEATED_QUERY_THRESHOLD times
+  or more is logged as a likely N+1 and counted per endpoint.
+
+/admin/query-profile lists the top offenders as JSON. Numbers are per
+worker process and kept until restart.
+
+Settings (environment variables, optional):
+    QUERY_PROFILER              1 to enable (default off)
+    SLOW_QUERY_MS               default 100
+    REPEATED_QUERY_THRESHOLD    default 5
+"""
+import functools
+import logging
+import os
+import re
+import threading
+import time
+from contextvars import ContextVar
+
+from logs import log_event
+
+log = logging.getLogger(__name__)
+
+EXPLAIN_INTERVAL = 60.0          # seconds between EXPLAINs of one fingerprint
+_EXPLAINABLE = ('select', 'with', 'insert', 'update', 'delete')
+
+_COMMENT = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?|\$\d+')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.I)
+_SPACE = re.compile(r'\s+')
+
+_current = ContextVar('query_profile', default=None)
+
+
+def profiler_settings_from_env():
+    return {
+        'enabled': os.environ.get('QUERY_PROFILER', '0') == '1',
+        'slow_ms': float(os.environ.get('SLOW_QUERY_MS', 100)),
+        'repeat_threshold': int(os.environ.get('REPEATED_QUERY_THRESHOLD', 5)),
+    }
+
+
+@functools.lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """Normalized statement shape: literals -> ?, IN (?, ?, ...) -> IN (...)"""
+    sql = _COMMENT.sub(' ', sql)
+    sql = _STRING.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACE.sub(' ', sql).strip().rstrip(';')
+
+
+def explain(conn, query, params, postgres):
+    """Plan lines for a statement, run on the connection that executed it"""
+    if postgres:
+        # a failed EXPLAIN must not abort the route's transaction
+        cursor = conn.cursor()
+        cursor.execute('SAVEPOINT query_profiler')
+        try:
+            cursor.execute('EXPLAIN ' + query.replace('?', '%s'), params or None)
+            rows = cursor.fetchall()
+        except Exception:
+            cursor.execute('ROLLBACK TO SAVEPOINT query_profiler')
+            raise
+        finally:
+            cursor.execute('RELEASE SAVEPOINT query_profiler')
+            cursor.close()
+        return [list(r.values())[0] if isinstance(r, dict) else r[0] for r in rows]
+    rows = conn.execute('EXPLAIN QUERY PLAN ' + query, params or ()).fetchall()
+    return [r[3] for r in rows]
+
+
+class StatementStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.slow = 0
+        self.plan = None
+        self.explained_at = 0.0
+
+    def as_dict(self, fp):
+        return {'fingerprint': fp, 'count': self.count, 'total_ms': round(self.total * 1000, 2),
+                'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0,
+                'max_ms': round(self.max * 1000, 2), 'slow': self.slow, 'plan': self.plan}
+
+
+class QueryProfiler:
+    def __init__(self, postgres=False, enabled=False, slow_ms=100.0, repeat_threshold=5):
+        self.postgres = postgres
+        self.enabled = enabled
+        self.slow_seconds = slow_ms / 1000.0
+        self.repeat_threshold = repeat_threshold
+        self._lock = threading.Lock()
+        self._statements = {}            # fingerprint -> StatementStats
+        self._repeats = {}               # (endpoint, fingerprint) -> [requests, worst count]
+
+    def start_request(self):
+        return _current.set({}) if self.enabled else None
+
+    def finish_request(self, token, endpoint):
+        """Flag fingerprints the request ran repeatedly (likely N+1)"""
+        if token is None:
+            return
+        seen = _current.get()
+        _current.reset(token)
+        for fp, (count, seconds) in seen.items():
+            if count < self.repeat_threshold:
+                continue
+            log_event(log, 'db.repeated_query', logging.WARNING, endpoint=endpoint, count=count,
+                      total_ms=round(seconds * 1000, 2), fingerprint=fp)
+            with self._lock:
+                entry = self._repeats.setdefault((endpoint, fp), [0, 0])
+                entry[0] += 1
+                entry[1] = max(entry[1], count)
+
+    def record(self, conn, query, params, seconds):
+        fp = fingerprint(query)
+        seen = _current.get()
+        if seen is not None:
+            count, total = seen.get(fp, (0, 0.0))
+            seen[fp] = (count + 1, total + seconds)
+        slow = seconds >= self.slow_seconds
+        with self._lock:
+            stats = self._statements.get(fp)
+            if stats is None:
+                stats = self._statements[fp] = StatementStats()
+            stats.count += 1
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+            if not slow:
+                return
+            stats.slow += 1
+            now = time.monotonic()
+            due = now - stats.explained_at >= EXPLAIN_INTERVAL
+            if due:
+                stats.explained_at = now
+        plan = stats.plan
+        if due and query.lstrip().split(None, 1)[0].lower() in _EXPLAINABLE:
+            try:
+                plan = stats.plan = explain(conn, query, params, self.postgres)
+            except Exception as e:
+                plan = [f'EXPLAIN failed: {e}']
+        log_event(log, 'db.slow_query', logging.WARNING, ms=round(seconds * 1000, 2), fingerprint=fp,
+                  plan=plan)
+
+    def top(self, limit=20, by='total'):
+        """Worst statements by total, count, mean or max time, and the worst repeated ones"""
+        key = {'total': lambda s: s.total, 'count': lambda s: s.count,
+               'mean': lambda s: s.total / s.count, 'max': lambda s: s.max}[by]
+        with self._lock:
+            statements = sorted(self._statements.items(), key=lambda item: key(item[1]), reverse=True)
+            repeats = sorted(self._repeats.items(), key=lambda item: (item[1][0], item[1][1]), reverse=True)
+            return {
+                'enabled': self.enabled,
+                'slow_ms': self.slow_seconds * 1000,
+                'repeat_threshold': self.repeat_threshold,
+                'statements': [stats.as_dict(fp) for fp, stats in statements[:limit]],
+                'repeated': [{'endpoint': endpoint, 'fingerprint': fp, 'requests': n, 'max_per_request': worst}
+                             for (endpoint, fp), (n, worst) in repeats[:limit]],
+            }
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._repeats.clear()
@@ -0,0 +1,126 @@
+"""
+Rendered-output cache for public pages and template fragments.
+
+Public pages only change when the catalog or the approved feedback changes,
+so their HTML is cached under a key built from those data versions and a
+repeat request is answered from memory without running Jinja (or the
+database query behind the page).
+
+Named fragments - the shared header and footer, the division grid on
+/services, the testimonials on the home page - are cached the same way from
+inside the templates, so a page that is rendered still reuses them:
+
+    {% call cache_fragment('footer') %} ... {% endcall %}
+    {% call cache_fragment('division_grid', catalog_version) %} ... {% endcall %}
+
+Volatile bits (the footer year) are never baked into cached HTML. Templates
+print them with {{ volatile('year') }}, which leaves a placeholder while
+rendering for the cache; the current value is filled in each time the
+entry is served.
+
+Entries are evicted least-recently-used once their total size exceeds the
+memory cap.
+
+Settings (environment variables, optional):
+    RENDER_CACHE_MB   memory cap per worker (default 32, 0 = no caching)
+"""
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+
+from markupsafe import Markup, escape
+
+# True while rendering output that will be cached (volatile() leaves holes)
+_punching = ContextVar('render_cache_punching', default=False)
+
+
+class RenderCache:
+    def __init__(self, max_bytes, bypass=None):
+        self.max_bytes = max_bytes
+        self._bypass = bypass or (lambda: False)   # () -> True to render without caching (debug)
+        self._entries = OrderedDict()              # key -> (html, size in bytes)
+        self._lock = threading.Lock()
+        self._volatiles = {}                       # name -> () -> str
+        self.bytes = 0
+        self.counters = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0 and not self._bypass()
+
+    def register_volatile(self, name, value):
+        """value: () -> str, computed every time a page using it is served"""
+        self._volatiles[name] = value
+
+    def volatile(self, name):
+        """Template global: the value now, or a placeholder when rendering for the cache"""
+        if _punching.get():
+            return Markup(f"<!--volatile:{name}-->")
+        return escape(self._volatiles[name]())
+
+    def fill(self, html):
+        """Replace the volatile placeholders in cached HTML with current values"""
+        if '<!--volatile:' not in html:
+            return html
+        for name, value in self._volatiles.items():
+            html = html.replace(f"<!--volatile:{name}-->", str(escape(value())))
+        return html
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.counters['hits'] += 1
+            return entry[0]
+
+    def put(self, key, html):
+        size = len(html.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (html, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.counters['evictions'] += 1
+
+    def _render(self, key, render):
+        html = self.get(key)
+        if html is None:
+            token = _punching.set(True)
+            try:
+                html = str(render())
+            finally:
+                _punching.reset(token)
+            self.put(key, html)
+        return html
+
+    def page(self, key, render):
+        """HTML of a whole page: from the cache, or render() -> str and cache it"""
+        if not self.enabled:
+            return render()
+        return self.fill(self._render(('page',) + tuple(key), render))
+
+    def fragment(self, name, *key, caller):
+        """Template global for {% call cache_fragment(name, *key) %}"""
+        if not self.enabled:
+            return caller()
+        html = self._render(('fragment', name) + key, caller)
+        # inside a page being cached the holes stay for page() to fill
+        return Markup(html if _punching.get() else self.fill(html))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, entries=len(self._entries), bytes=self.bytes, max_bytes=self.max_bytes)
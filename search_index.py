@@ -0,0 +1,185 @@
+"""
+Full-text search over the `services` table for /search and /search-results.
+
+SQLite:      FTS5 external-content table `services_fts`, kept in sync with
+             `services` by triggers, ranked with bm25() via the table's rank column.
+PostgreSQL:  generated `search_vector` tsvector column with a GIN index,
+             ranked with ts_rank().
+
+Both rank matches by field weight: name > short_desc > description, and
+return the name and a description snippet with the matched words wrapped
+in <span class="highlight">.
+"""
+import logging
+import re
+
+from markupsafe import Markup, escape
+
+from logs import log_event
+
+log = logging.getLogger(__name__)
+
+# Marker characters used by snippet()/ts_headline(); replaced after HTML escaping
+_HL_START = '\x02'
+_HL_END = '\x03'
+
+# bm25() column weights for (name, short_desc, description)
+SQLITE_WEIGHTS = (10.0, 4.0, 1.0)
+
+_TOKEN_RE = re.compile(r'[^\W_]+', re.UNICODE)
+
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS services_fts USING fts5(
+        name, short_desc, description,
+        content='services', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS services_fts_ai AFTER INSERT ON services BEGIN
+        INSERT INTO services_fts(rowid, name, short_desc, description)
+        VALUES (new.id, new.name, new.short_desc, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS services_fts_ad AFTER DELETE ON services BEGIN
+        INSERT INTO services_fts(services_fts, rowid, name, short_desc, description)
+        VALUES ('delete', old.id, old.name, old.short_desc, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS services_fts_au AFTER UPDATE ON services BEGIN
+        INSERT INTO services_fts(services_fts, rowid, name, short_desc, description)
+        VALUES ('delete', old.id, old.name, old.short_desc, old.description);
+        INSERT INTO services_fts(rowid, name, short_desc, description)
+        VALUES (new.id, new.name, new.short_desc, new.description);
+    END
+    """,
+]
+
+_POSTGRES_VECTOR = """
+    ALTER TABLE services ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(short_desc, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+"""
+
+# ORDER BY ... LIMIT lets SQLite defer highlight()/snippet() to the rows returned
+_SQLITE_SEARCH = """
+    SELECT s.id, s.name, s.slug, s.short_desc, s.description, s.image,
+           services_fts.rank AS rank,
+           highlight(services_fts, 0, char(2), char(3)) AS name_hl,
+           snippet(services_fts, -1, char(2), char(3), '…', 24) AS snippet_hl
+    FROM services_fts
+    JOIN services s ON s.id = services_fts.rowid
+    WHERE services_fts MATCH ?
+    ORDER BY services_fts.rank, s.name
+    LIMIT ?
+"""
+_SQLITE_RANK = "bm25({}, {}, {})".format(*SQLITE_WEIGHTS)
+
+# Rank in the inner query so ts_headline() only runs on the rows returned
+_POSTGRES_SEARCH = """
+    SELECT s.id, s.name, s.slug, s.short_desc, s.description, s.image, hits.rank,
+           ts_headline('english', s.name, hits.query, ?) AS name_hl,
+           ts_headline('english', coalesce(s.description, s.short_desc, ''), hits.query, ?) AS snippet_hl
+    FROM (
+        SELECT id, ts_rank(search_vector, query) AS rank, query
+        FROM services, to_tsquery('english', ?) query
+        WHERE search_vector @@ query
+        ORDER BY rank DESC
+        LIMIT ?
+    ) hits
+    JOIN services s ON s.id = hits.id
+    ORDER BY hits.rank DESC, s.name
+"""
+_PG_NAME_OPTS = f'HighlightAll=true, StartSel={_HL_START}, StopSel={_HL_END}'
+_PG_SNIPPET_OPTS = f'StartSel={_HL_START}, StopSel={_HL_END}, MaxWords=30, MinWords=12'
+
+
+def tokenize(q):
+    """Lower-cased word tokens of a user query (punctuation dropped)"""
+    return _TOKEN_RE.findall(q.lower())
+
+
+def highlight_html(text):
+    """Escape DB text and turn the highlight markers into <span class="highlight">"""
+    if not text:
+        return Markup('')
+    html = str(escape(text))
+    html = html.replace(_HL_START, '<span class="highlight">').replace(_HL_END, '</span>')
+    return Markup(html)
+
+
+class SearchIndex:
+    """Ranked full-text search over services for either backend"""
+
+    def __init__(self, execute, use_postgres):
+        self._execute = execute          # execute_query(conn, query, params)
+        self.use_postgres = use_postgres
+        self.available = True            # False if SQLite was built without FTS5
+
+    def detect(self, conn):
+        """Check the index exists (SQLite builds without FTS5 never create it)"""
+        if not self.use_postgres:
+            row = self._execute(conn, "SELECT name FROM sqlite_master WHERE type='table' AND name='services_fts'").fetchone()
+            self.available = row is not None
+        return self.available
+
+    def ensure(self, conn):
+        """Create the index structures if missing (run by migrations.py)"""
+        if self.use_postgres:
+            cursor = self._execute(conn, """
+                SELECT column_name FROM information_schema.columns
+                WHERE table_name = 'services' AND column_name = 'search_vector'
+            """)
+            if not cursor.fetchone():
+                self._execute(conn, _POSTGRES_VECTOR)
+                log_event(log, 'search.vector_added', table='services')
+            self._execute(conn, "CREATE INDEX IF NOT EXISTS idx_services_search ON services USING GIN (search_vector)")
+            return
+
+        import sqlite3
+        exists = self._execute(conn, "SELECT name FROM sqlite_master WHERE type='table' AND name='services_fts'").fetchone()
+        try:
+            for ddl in _SQLITE_DDL:
+                self._execute(conn, ddl)
+        except sqlite3.OperationalError as e:
+            # e.g. "no such module: fts5" - search falls back to substring matching
+            log_event(log, 'search.fts_unavailable', logging.WARNING, error=str(e), fallback='substring')
+            self.available = False
+            return
+        if not exists:
+            # Field weighting for the built-in rank column, then index the
+            # rows that were already there before the FTS table existed
+            self._execute(conn, "INSERT INTO services_fts(services_fts, rank) VALUES ('rank', ?)", (_SQLITE_RANK,))
+            self._execute(conn, "INSERT INTO services_fts(services_fts) VALUES ('rebuild')")
+            log_event(log, 'search.fts_built', index='services_fts')
+
+    def match_expression(self, q):
+        """Backend query string for the user's words, each matched as a prefix"""
+        tokens = tokenize(q)
+        if not tokens:
+            return None
+        if self.use_postgres:
+            return ' & '.join(f'{t}:*' for t in tokens)
+        return ' '.join(f'"{t}"*' for t in tokens)
+
+    def search(self, conn, q, limit=20):
+        """Ranked matches as dicts (service columns plus name_html and snippet_html)"""
+        expr = self.match_expression(q)
+        if expr is None:
+            return []
+        if self.use_postgres:
+            cursor = self._execute(conn, _POSTGRES_SEARCH, (_PG_NAME_OPTS, _PG_SNIPPET_OPTS, expr, limit))
+        else:
+            cursor = self._execute(conn, _SQLITE_SEARCH, (expr, limit))
+        results = []
+        for row in cursor.fetchall():
+            r = dict(row) if not isinstance(row, dict) else dict(row)
+            r['name_html'] = highlight_html(r.pop('name_hl', None) or r.get('name'))
+            r['snippet_html'] = highlight_html(r.pop('snippet_hl', None) or r.get('short_desc'))
+            results.append(r)
+        return results
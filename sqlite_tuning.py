@@ -0,0 +1,161 @@
+"""
+SQLite performance profile, applied to every connection the app opens.
+
+The "production" profile (the default) switches the database to WAL so
+readers no longer block behind a writer, relaxes fsync to synchronous=NORMAL
+(safe with WAL: a power loss can drop the last commits but never corrupts the
+file), memory-maps the file, enlarges the page and statement caches and waits
+for locks instead of failing with "database is locked". The "default" profile
+keeps sqlite3.connect() defaults, which is what the app used before; it is
+mostly useful for benchmarks/sqlite_concurrency.py.
+
+Settings (environment variables, optional):
+    SQLITE_PROFILE              production | default
+    SQLITE_JOURNAL_MODE         e.g. WAL, DELETE
+    SQLITE_SYNCHRONOUS          OFF | NORMAL | FULL | EXTRA
+    SQLITE_MMAP_SIZE            bytes of the file to memory-map
+    SQLITE_CACHE_SIZE           page cache; negative = KiB, positive = pages
+    SQLITE_BUSY_TIMEOUT_MS      how long to wait for a lock
+    SQLITE_CACHED_STATEMENTS    prepared statements kept per connection
+    SQLITE_MAINTENANCE_SECONDS  interval of the checkpoint/optimize task (0 = off)
+    SQLITE_CHECKPOINT_MODE      PASSIVE (never blocks) | FULL | RESTART | TRUNCATE
+
+SQLiteMaintenance is a background thread that periodically checkpoints the
+WAL (so it does not keep growing between bursts of writes) and runs
+PRAGMA optimize to refresh the planner statistics.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from logs import log_event
+
+log = logging.getLogger(__name__)
+
+PROFILES = {
+    'production': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,            # 64 MiB
+        'busy_timeout_ms': 5000,
+        'cached_statements': 256,
+        'maintenance_seconds': 300.0,
+    },
+    'default': {
+        'journal_mode': None,                # leave as is (rollback journal)
+        'synchronous': None,
+        'mmap_size': None,
+        'cache_size': None,
+        'busy_timeout_ms': 5000,             # sqlite3.connect(timeout=5.0)
+        'cached_statements': 128,
+        'maintenance_seconds': 0.0,
+    },
+}
+
+_JOURNAL_MODES = {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'}
+_SYNCHRONOUS = {'OFF', 'NORMAL', 'FULL', 'EXTRA'}
+_CHECKPOINT_MODES = {'PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'}
+
+
+def sqlite_settings_from_env():
+    """The profile named by SQLITE_PROFILE with any SQLITE_* overrides applied"""
+    name = os.environ.get('SQLITE_PROFILE', 'production')
+    if name not in PROFILES:
+        raise ValueError(f"SQLITE_PROFILE must be one of {', '.join(PROFILES)}, not {name!r}")
+    settings = dict(PROFILES[name], profile=name)
+    for key, env, cast in (
+        ('journal_mode', 'SQLITE_JOURNAL_MODE', str.upper),
+        ('synchronous', 'SQLITE_SYNCHRONOUS', str.upper),
+        ('mmap_size', 'SQLITE_MMAP_SIZE', int),
+        ('cache_size', 'SQLITE_CACHE_SIZE', int),
+        ('busy_timeout_ms', 'SQLITE_BUSY_TIMEOUT_MS', int),
+        ('cached_statements', 'SQLITE_CACHED_STATEMENTS', int),
+        ('maintenance_seconds', 'SQLITE_MAINTENANCE_SECONDS', float),
+    ):
+        if os.environ.get(env):
+            settings[key] = cast(os.environ[env])
+    if settings['journal_mode'] is not None and settings['journal_mode'] not in _JOURNAL_MODES:
+        raise ValueError(f"SQLITE_JOURNAL_MODE {settings['journal_mode']!r} is not a journal mode")
+    if settings['synchronous'] is not None and settings['synchronous'] not in _SYNCHRONOUS:
+        raise ValueError(f"SQLITE_SYNCHRONOUS {settings['synchronous']!r} is not a synchronous level")
+    return settings
+
+
+def connect_sqlite(path, settings):
+    """Open a connection (usable from any thread) with the profile's PRAGMAs applied"""
+    conn = sqlite3.connect(path, check_same_thread=False,
+                           timeout=settings['busy_timeout_ms'] / 1000.0,
+                           cached_statements=settings['cached_statements'])
+    # journal_mode is stored in the file; switching needs an exclusive lock, so
+    # only ask for it when the database is not in that mode yet
+    mode = settings['journal_mode']
+    if mode is not None and conn.execute("PRAGMA journal_mode").fetchone()[0].upper() != mode:
+        conn.execute(f"PRAGMA journal_mode = {mode}")
+    if settings['synchronous'] is not None:
+        conn.execute(f"PRAGMA synchronous = {settings['synchronous']}")
+    if settings['mmap_size'] is not None:
+        conn.execute(f"PRAGMA mmap_size = {int(settings['mmap_size'])}")
+    if settings['cache_size'] is not None:
+        conn.execute(f"PRAGMA cache_size = {int(settings['cache_size'])}")
+    return conn
+
+
+class SQLiteMaintenance:
+    """Background WAL checkpoint + PRAGMA optimize, once per process"""
+
+    def __init__(self, connect, interval=300.0, checkpoint_mode='PASSIVE'):
+        if checkpoint_mode not in _CHECKPOINT_MODES:
+            raise ValueError(f"checkpoint_mode must be one of {', '.join(sorted(_CHECKPOINT_MODES))}")
+        self._connect = connect          # () -> pooled connection
+        self.interval = interval
+        self.checkpoint_mode = checkpoint_mode
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.counters = {'runs': 0, 'errors': 0, 'wal_pages_checkpointed': 0, 'last_run_ms': 0.0}
+        self.last_checkpoint = None      # (busy, wal pages, pages checkpointed)
+
+    def run_once(self):
+        """Checkpoint the WAL and refresh planner statistics"""
+        start = time.perf_counter()
+        conn = self._connect()
+        try:
+            row = conn.execute(f"PRAGMA wal_checkpoint({self.checkpoint_mode})").fetchone()
+            conn.execute("PRAGMA optimize")
+        finally:
+            conn.close()
+        self.last_checkpoint = tuple(row) if row is not None else None
+        if row is not None and row[2] > 0:
+            self.counters['wal_pages_checkpointed'] += row[2]
+        self.counters['runs'] += 1
+        self.counters['last_run_ms'] = (time.perf_counter() - start) * 1000
+        return self.last_checkpoint
+
+    def start(self):
+        """Start the maintenance thread once per process (no-op when interval is 0)"""
+        if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        with self._thread_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name='sqlite-maintenance', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_forever(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                self.counters['errors'] += 1
+                log_event(log, 'sqlite.maintenance_failed', logging.WARNING, error=str(e))
+
+    def stats(self):
+        return dict(self.counters, interval=self.interval, checkpoint_mode=self.checkpoint_mode,
+                    last_checkpoint=self.last_checkpoint)
@@ -0,0 +1,45 @@
+"""
+Startup timeline: when did app.py start loading, finish its imports, become
+ready to serve, reach the database and answer its first request.
+
+app.py imports this module first, so the clock starts before Flask and the
+rest of the app are imported. Each stage is recorded once per process.
+"""
+import os
+import threading
+import time
+
+
+class StartupTimeline:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.pid = os.getpid()
+        self.stages = []                 # [(stage, seconds since start)]
+        self._lock = threading.Lock()
+
+    def mark(self, stage):
+        """Record a stage (first call wins); returns seconds since start"""
+        with self._lock:
+            for name, elapsed in self.stages:
+                if name == stage:
+                    return elapsed
+            elapsed = time.perf_counter() - self.started
+            self.stages.append((stage, elapsed))
+            return elapsed
+
+    def elapsed(self, stage):
+        return next((e for name, e in self.stages if name == stage), None)
+
+    def summary(self):
+        return ' → '.join(f"{name} {elapsed * 1000:.0f} ms" for name, elapsed in self.stages)
+
+    def as_dict(self):
+        return {
+            'pid': self.pid,
+            'started_at': self.started_at,
+            'stages': [{'stage': name, 'ms': round(elapsed * 1000, 1)} for name, elapsed in self.stages],
+        }
+
+
+timeline = StartupTimeline()